@@ -1,4 +1,6 @@
 from BattleshipSimulator.Models.GetterSetter import GetterSetter
+import threading
+import time
 
 class BattleshipController(GetterSetter):
     """
@@ -22,15 +24,39 @@ class BattleshipController(GetterSetter):
         super().__init__()
         self.simulation = simulation
         self.add_child("Simulation", self.simulation)
+        # Guards the simulation state when it is stepped by a SimulationScheduler thread
+        self.lock = threading.RLock()
+        self.scheduler = None
     
     def restart(self):
-        self.simulation.restart()
-        self.__init__(self.simulation)
-        self.simulation.start()
+        with self.lock:
+            self.simulation.restart()
+            self.simulation.start()
     
     def update(self, timedelta):
-        if self.simulation.simulation_running:
-            self.simulation.update(timedelta)
+        with self.lock:
+            if self.simulation.simulation_running:
+                self.simulation.update(timedelta)
+
+    def start_scheduler(self, timestep = .5, real_time_ratio = 1):
+        """
+        Step the simulation on its own fixed-step clock instead of from the view's frame updates.
+
+        Parameters:
+        -----------
+        timestep : float
+            The fixed simulation time step (in seconds).
+        real_time_ratio : float or None
+            Simulated seconds per wall-clock second; None or 0 runs as fast as possible.
+        """
+        self.stop_scheduler()
+        self.scheduler = SimulationScheduler(self, timestep, real_time_ratio)
+        self.scheduler.start()
+
+    def stop_scheduler(self):
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
 
     def logger_get(self, index):
         return self.simulation.logger.get(index)
@@ -44,4 +70,70 @@ class BattleshipController(GetterSetter):
         action : str
             The user action to handle.
         """
-        self.model.handle_command(action)
\ No newline at end of file
+        self.model.handle_command(action)
+
+class SimulationScheduler():
+    """
+    Runs the simulation on a fixed-step clock in a background thread, decoupled from the view's frame rate.
+
+    The view only samples the latest state (holding the controller's lock while it reads), so a long
+    scenario can run many times faster than real time while the display stays responsive.
+
+    Attributes:
+    -----------
+    controller : BattleshipController
+        The controller whose simulation is stepped.
+    timestep : float
+        The fixed simulation time step (in seconds).
+    real_time_ratio : float or None
+        Simulated seconds per wall-clock second; None or 0 runs as fast as possible.
+    ticks : int
+        The number of simulation steps taken so far.
+    """
+
+    # How long to wait before checking again while the simulation is paused or has ended
+    IDLE_WAIT = .02
+    # Never try to catch up on more than this much wall-clock time (e.g. after the window was dragged)
+    MAX_LAG = .25
+
+    def __init__(self, controller, timestep = .5, real_time_ratio = 1):
+        self.controller = controller
+        self.timestep = timestep
+        self.real_time_ratio = real_time_ratio if real_time_ratio else None
+        self.ticks = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target = self.run, name = "SimulationScheduler", daemon = True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+    def run(self):
+        next_tick = time.perf_counter()
+        while self.running:
+            simulation = self.controller.simulation
+            if not simulation.simulation_running or simulation.simulation_paused:
+                time.sleep(self.IDLE_WAIT)
+                next_tick = time.perf_counter()
+                continue
+            self.controller.update(self.timestep)
+            self.ticks += 1
+            if self.real_time_ratio is None:
+                # Give the view thread a chance to take the lock between steps
+                time.sleep(0)
+            else:
+                next_tick += self.timestep / self.real_time_ratio
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -self.MAX_LAG:
+                    next_tick = time.perf_counter()
+                else:
+                    time.sleep(0)
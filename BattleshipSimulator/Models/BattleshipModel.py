@@ -58,6 +58,13 @@ class BattleshipModel(GetterSetter):
             "user_override", "user_override_heading", "ca_override", "ca_override_heading", "ca_override_speed",
             "supervisor_override_heading", "supervisor_override_speed", "chosen_heading", "current_speed", "out_of_bounds"
         ]
+        # The dynamics state itself (oldEta, oldNu, oldU and the autopilot states) is captured by the world's state store
+        self.snapshot_variables = [
+            "x", "y", "heading", "last_x", "last_y", "last_heading", "current_speed", "waypoint_heading", "chosen_heading",
+            "option_port", "option_starboard", "chosen_direction", "action_code", "actions", "user_override", "user_override_heading",
+            "ca_override", "ca_override_heading", "ca_override_speed", "supervisor_override_heading", "supervisor_override_speed", "out_of_bounds"
+        ]
+        self.snapshot_histories = ["sim_data_rows"]
         
         self.command_registry = {}
         self.setup()
@@ -93,15 +100,104 @@ class BattleshipModel(GetterSetter):
         
         self.vehicle = frigate('headingAutopilot', self.current_speed, self.heading)
         self.vehicle.L = abs(min_y) + abs(max_y)
-        self.simData = np.empty( [0, 12 + 2 * self.vehicle.dimU], float)
-        self.oldEta = np.array([self.x, self.y, 0, 0, 0, 0], float)
-        self.oldU = self.vehicle.u_actual
-        self.oldNu = self.vehicle.nu
+        self.sim_data_rows = []
+        # Until the model is attached to a world's state store, the dynamics state is kept locally
+        self.state = None
+        self.state_index = None
+        self._oldEta = np.array([self.x, self.y, 0, 0, 0, 0], float)
+        self._oldU = self.vehicle.u_actual
+        self._oldNu = self.vehicle.nu
+
+    def attach_state(self, state):
+        """
+        Move the dynamics state of this model into a world-level state store.
+
+        Parameters:
+        -----------
+        state : WorldState
+            The struct-of-arrays store that advances every ship of the world at once.
+        """
+        self.state_index = state.add_ship(self.vehicle, self._oldEta, self._oldNu, self._oldU)
+        self.state = state
+
+    @property
+    def oldEta(self):
+        return self._oldEta if self.state is None else self.state.eta[self.state_index]
+
+    @oldEta.setter
+    def oldEta(self, value):
+        if self.state is None:
+            self._oldEta = value
+        else:
+            self.state.eta[self.state_index] = value
+
+    @property
+    def oldNu(self):
+        return self._oldNu if self.state is None else self.state.nu[self.state_index]
+
+    @oldNu.setter
+    def oldNu(self, value):
+        if self.state is None:
+            self._oldNu = value
+        else:
+            self.state.nu[self.state_index] = value
+
+    @property
+    def oldU(self):
+        return self._oldU if self.state is None else self.state.u_actual[self.state_index]
+
+    @oldU.setter
+    def oldU(self, value):
+        if self.state is None:
+            self._oldU = value
+        else:
+            self.state.u_actual[self.state_index] = value
+
+    @property
+    def simData(self):
+        return np.array(self.sim_data_rows, float).reshape(-1, 12 + 2 * self.vehicle.dimU)
 
     def update(self, timedelta):
         """
         Update the X and Y coordinates of the battleship at regular intervals.
 
+        Parameters:
+        -----------
+        timedelta : float
+            The time duration between coordinate updates (in seconds).
+        """
+        if self.prepare_update(timedelta):
+            # Generate the next set of data using the python vehicle simulator
+            if self.state is None:
+                thisSimData, self._oldEta, self._oldNu, self._oldU = SimulatorUtilities.getNextPosition(self.current_speed, self.chosen_heading, self._oldEta, self.vehicle, timedelta, self._oldNu, self._oldU)
+            else:
+                thisSimData = self.state.step([self.state_index], [self.chosen_heading], timedelta)
+            self.complete_update(thisSimData[0])
+
+    def prepare_update(self, timedelta):
+        """
+        Update the systems and decide on the heading for this time step.
+
+        The World calls this for every ship, advances all ships that need to move in one
+        vectorized call, and then finishes each ship with `complete_update`.
+
+        Parameters:
+        -----------
+        timedelta : float
+            The time duration between coordinate updates (in seconds).
+
+        Returns:
+        --------
+        bool
+            True if the ship should be advanced by the vehicle dynamics this time step.
+        """
+        self.update_systems(timedelta)
+        return self.decide()
+
+    def update_systems(self, timedelta):
+        """
+        Clear the overrides of the last time step and update the ship's systems.
+
         Parameters:
         -----------
         timedelta : float
@@ -116,6 +212,16 @@ class BattleshipModel(GetterSetter):
 
         for system in self.subsystems.values():
             system.update(timedelta)
+
+    def decide(self):
+        """
+        Decide on the heading for this time step, once the systems have been updated.
+
+        Returns:
+        --------
+        bool
+            True if the ship should be advanced by the vehicle dynamics this time step.
+        """
         
         if self.current_speed > 0 and len(self.children["Navigation"].waypoints) > 0:
 
@@ -165,7 +271,7 @@ class BattleshipModel(GetterSetter):
             # If the ML reports a speed of 0, stop the ship immediately
             if "speed" in supervisor_data and supervisor_data["speed"] == 0:
                 self.current_speed = 0
-                return None
+                return False
             
             # If the ML's heading is within 2 degrees of the heading we calculated, continue
             if "heading" not in supervisor_data or SimulatorUtilities.is_within_threshold(supervisor_data["heading"], self.waypoint_heading, 2):
@@ -185,28 +291,42 @@ class BattleshipModel(GetterSetter):
                 if self.user_override_heading is not None:
                     self.chosen_heading = self.user_override_heading
                     self.user_override = True
+
+                # The supervisor may adjust how the final heading is given to the autopilot
+                if self.supervisor is not None:
+                    self.chosen_heading = self.supervisor.autopilot_heading(self.chosen_heading)
                 
                 if abs(abs(self.chosen_heading) - abs(self.heading)) > 1:
                     self.update_action_code(turning = True)
                 
-                # Generate the next set of data using the python vehicle simulator
-                thisSimData, self.oldEta, self.oldNu, self.oldU = SimulatorUtilities.getNextPosition(self.current_speed, self.chosen_heading, self.oldEta, self.vehicle, timedelta, self.oldNu, self.oldU)
-                self.simData = np.vstack([self.simData, thisSimData])
-
-                self.last_x, self.last_y, self.last_heading = self.x, self.y, self.heading
-                self.x = float(thisSimData[0][0])
-                self.y = float(thisSimData[0][1])
-                self.heading = SimulatorUtilities.calculate_angle_degrees(self.last_x, self.last_y, self.x, self.y)
-
-                if (self.last_x, self.last_y) != (self.x, self.y):
-                    self.update_action_code(moving = True)
-                self.actions = self.translate_action_code(self.action_code)
-                        
-                # If the ship goes outside of the guardrails, treat it like a collision
-                self.out_of_bounds = self.x <= self.guardrails[0] or self.x >= self.guardrails[2] or self.y <= self.guardrails[1] or self.y >= self.guardrails[3]
+                return True
             
             else:
                 self.current_speed = 0
+        return False
+
+    def complete_update(self, sim_data):
+        """
+        Apply the result of the vehicle dynamics for this time step.
+
+        Parameters:
+        -----------
+        sim_data : numpy.ndarray
+            The simulation data row (eta, nu, u_control, u_actual) produced for this ship.
+        """
+        self.sim_data_rows.append(sim_data)
+
+        self.last_x, self.last_y, self.last_heading = self.x, self.y, self.heading
+        self.x = float(sim_data[0])
+        self.y = float(sim_data[1])
+        self.heading = SimulatorUtilities.calculate_angle_degrees(self.last_x, self.last_y, self.x, self.y)
+
+        if (self.last_x, self.last_y) != (self.x, self.y):
+            self.update_action_code(moving = True)
+        self.actions = self.translate_action_code(self.action_code)
+                
+        # If the ship goes outside of the guardrails, treat it like a collision
+        self.out_of_bounds = self.x <= self.guardrails[0] or self.x >= self.guardrails[2] or self.y <= self.guardrails[1] or self.y >= self.guardrails[3]
     
     def set_action_code(self, i):
         # The action code is a binary number that represents the states that the ship can be in
@@ -236,13 +356,12 @@ class BattleshipModel(GetterSetter):
         else:
             return ""
 
-    def logging_package(self):
-        logging_package = {k: getattr(self, k) for k in self.logging_variables}
+    def logging_schema(self):
+        logging_schema = [(k, self, k) for k in self.logging_variables]
         for child_name, child in self.children.items():
-            system_log_package = child.logging_package()
-            for k, v in system_log_package.items():
-                logging_package[f"{child_name}.{k}"] = v
-        return logging_package
+            for k, owner, attribute in child.logging_schema():
+                logging_schema.append((f"{child_name}.{k}", owner, attribute))
+        return logging_schema
 
     def attach_system(self, system_name, system):
         """
@@ -1,6 +1,6 @@
 import BattleshipSimulator.Models.SimulatorUtilities as SimulatorUtilities
 from BattleshipSimulator.Models.GetterSetter import GetterSetter
-from shapely.geometry import Point, Polygon
+from shapely.geometry import Polygon
 
 class BattleshipSystem(GetterSetter):
     """
@@ -29,17 +29,8 @@ class BattleshipSystem(GetterSetter):
     def update(self, timedelta):
         pass
 
-    def logging_package(self):
-        logged_objects = {}
-        for k in self.logging_variables:
-            logged_value = getattr(self, k)
-            if type(logged_value) is list:
-                logged_value = [x for x in logged_value]
-            elif type(logged_value) is dict:
-                logged_value = {k:v for k,v in logged_value}
-            logged_objects[k] = logged_value
-            
-        return logged_objects
+    def logging_schema(self):
+        return [(k, self, k) for k in self.logging_variables]
 
     def commands(self):
         """
@@ -115,10 +106,15 @@ class Engine(BattleshipSystem):
         self.desired_speed = self.model.current_speed if "desired_speed" not in kwargs else kwargs["desired_speed"]
         self.prev_speed = 0
         self.logging_variables = ["desired_speed"]
+        self.snapshot_variables = ["desired_speed", "prev_speed"]
+        # Resolved on the first update, once the RadarSonar has been attached
+        self.collision_event_handle = None
     
     def update(self, timedelta):
         self.prev_speed = self.model.current_speed
-        if not self.model.get_attribute("RadarSonar:collision_event"):
+        if self.collision_event_handle is None:
+            self.collision_event_handle = self.model.resolve("RadarSonar:collision_event")
+        if not self.collision_event_handle.get():
             # Update the ship's current speed
             if self.model.current_speed != self.desired_speed:
                 speed_difference = self.desired_speed - self.model.current_speed
@@ -155,6 +151,7 @@ class Weapons(BattleshipSystem):
         self.target_distances = []
         self.has_targets = False
         self.logging_variables = ["targets", "target_distances", "has_targets"]
+        self.snapshot_variables = ["targets", "target_distances", "has_targets"]
         if "targets" in kwargs:
             for target in kwargs["targets"]:
                 self.add_target(*target)
@@ -197,6 +194,8 @@ class Navigation(BattleshipSystem):
         self.next_waypoint = None
         self.has_waypoints = False
         self.logging_variables = ["next_waypoint", "waypoints", "waypoint_distances", "completed_waypoints", "has_waypoints"]
+        self.snapshot_variables = ["next_waypoint", "waypoints", "waypoint_distances", "completed_waypoints", "has_waypoints"]
+        self.snapshot_histories = ["actual_path"]
         if "waypoints" in kwargs:
             for waypoint in kwargs["waypoints"]:
                 self.add_waypoint(*waypoint)
@@ -247,51 +246,44 @@ class RadarSonar(BattleshipSystem):
         self.warning_objects = []
         self.warning_object_distances = []
         self.collision_objects = []
+        # The closest vertex of each radar and warning object, with its distance and the mean distance of its vertices
+        self.radar_object_summaries = []
+        self.warning_object_summaries = []
+        # The radar and warning objects as Shapely geometries, for the navigators
+        self.radar_geometries = []
+        self.warning_geometries = []
         self.logging_variables = ["collision_warning", "collision_event", "radar_geometry", "radar_objects", "radar_object_distances", "warning_objects", "radar_object_distances", "collision_objects", "transformed_geometry"]
+        self.snapshot_variables = [
+            "collision_warning", "collision_event", "transformed_geometry", "radar_geometry", "objects", "radar_objects",
+            "radar_object_distances", "warning_objects", "warning_object_distances", "collision_objects",
+            "transformed_polygon", "radar_geometries", "warning_geometries", "radar_object_summaries", "warning_object_summaries", "sensed_pose"
+        ]
+        # The hull and minimum safe area in the ship's own frame, as closed rings of vertices
+        self.hull_vertices = SimulatorUtilities.ring_vertices(self.model.geometry)
         #self.transformed_geometry = SimulatorUtilities.transform_coordinates(self.model.geometry, self.model.x, self.model.y, SimulatorUtilities.heading_to_angle(self.model.heading))
-        self.transformed_geometry = SimulatorUtilities.transform_coordinates(self.model.geometry, self.model.x, self.model.y, self.model.heading)
+        self.transformed_geometry = SimulatorUtilities.vertex_list(SimulatorUtilities.rigid_transform(self.hull_vertices, self.model.x, self.model.y, self.model.heading))
+        self.transformed_polygon = Polygon(self.transformed_geometry)
+        # The (x, y, heading) that the hull was last sensed at; the next pass sweeps the hull from there
+        self.sensed_pose = (self.model.x, self.model.y, self.model.heading)
         self.minimum_safe_distance = 100 if "minimum_safe_distance" not in kwargs else kwargs["minimum_safe_distance"]
         self.minimum_safe_area_geometry = self.calculate_min_safe_distance_area()
+        self.minimum_safe_area_vertices = SimulatorUtilities.ring_vertices(self.minimum_safe_area_geometry)
         self.radar_range = 1000 if "radar_range" not in kwargs else kwargs["radar_range"]
         self.radar_geometry = self.get_radar_geometry(self.model.x, self.model.y, self.radar_range)
         self.collision_warning = False
         self.collision_event = False
+        # The results of the World's sensing pass, applied on the next update
+        self.pending_sensing = None
     
     def update(self, timedelta):
-        # Identify collisions with the known world
-        self.collision_warning = False
-        self.collision_event = False
-        #current_msa_geometry = SimulatorUtilities.transform_coordinates(self.minimum_safe_area_geometry, self.model.x, self.model.y, SimulatorUtilities.heading_to_angle(self.model.heading))
-        #self.transformed_geometry = SimulatorUtilities.transform_coordinates(self.model.geometry, self.model.x, self.model.y, SimulatorUtilities.heading_to_angle(self.model.heading))
-        current_msa_geometry = SimulatorUtilities.transform_coordinates(self.minimum_safe_area_geometry, self.model.x, self.model.y, self.model.heading)
-        self.transformed_geometry = SimulatorUtilities.transform_coordinates(self.model.geometry, self.model.x, self.model.y, self.model.heading)
-        self.radar_geometry = self.get_radar_geometry(self.model.x, self.model.y, self.radar_range)
-        object_names = [k for k,m in self.get_attribute("World:models").items() if m is not self.model]
-        self.objects = [self.get_attribute(f"World:{n}:RadarSonar:transformed_geometry") for n in object_names]
-        self.radar_objects = []
-        self.radar_object_distances = []
-        self.warning_objects = []
-        self.warning_object_distances = []
-        self.collision_objects = []
-        for world_object in self.chart + self.objects:
-            in_radar_range, intersecting_shapes = SimulatorUtilities.polygons_intersect(self.radar_geometry, world_object)
-            if in_radar_range:
-                for intersecting_shape in intersecting_shapes:
-                    self.radar_objects.append(intersecting_shape)
-                    # Get the distances
-                    self.radar_object_distances.append([SimulatorUtilities.distance(c, (self.model.x, self.model.y)) for c in intersecting_shape])
-
-            in_msa_range, intersecting_shapes = SimulatorUtilities.polygons_intersect(current_msa_geometry, world_object)
-            if in_msa_range:
-                self.collision_warning = True
-                for intersecting_shape in intersecting_shapes:
-                    self.warning_objects.append(intersecting_shape)
-                    # Get the distances
-                    self.warning_object_distances.append([SimulatorUtilities.distance(c, (self.model.x, self.model.y)) for c in intersecting_shape])
-                if SimulatorUtilities.polygons_intersect(self.transformed_geometry, world_object)[0]:
-                    self.collision_event = True
-                    self.collision_objects.append(world_object)
-    
+        # Identify collisions with the known world. The World senses for every ship at once before
+        # the ships are updated; if this ship is updated on its own, sense for it alone.
+        if self.pending_sensing is None:
+            self.resolve("World:sensor").get().sense([self])
+        for k, v in self.pending_sensing.items():
+            setattr(self, k, v)
+        self.pending_sensing = None
+
     def commands(self):
         return ["TOGGLE"]
 
@@ -306,4 +298,4 @@ class RadarSonar(BattleshipSystem):
         return SimulatorUtilities.buffer_shape(self.model.geometry, self.minimum_safe_distance)
 
     def get_radar_geometry(self, x, y, r):
-        return list(Point(x, y).buffer(r, resolution = 15).exterior.coords)
\ No newline at end of file
+        return SimulatorUtilities.vertex_list(SimulatorUtilities.circle_vertices(x, y, r))
\ No newline at end of file
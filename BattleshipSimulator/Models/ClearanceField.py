@@ -0,0 +1,169 @@
+import hashlib
+import math
+import numpy as np
+import os
+import shapely
+import tempfile
+
+class ClearanceField:
+    """
+    A signed distance field of the world's obstacles: the distance to the nearest obstacle at
+    every point of a regular grid, negative inside an obstacle.
+
+    The field is computed once from the obstacles and cached to disk, keyed by a hash of the
+    obstacles and the grid settings, so every run of the same scenario loads it. Clearance and
+    gradient queries are bilinear lookups; points outside of the grid (which is far from every
+    obstacle) are answered exactly.
+
+    Attributes:
+    -----------
+    resolution : float
+        The spacing of the grid, in meters.
+    margin : float
+        How far the grid extends beyond the bounds of the obstacles, in meters.
+    origin : numpy.ndarray
+        The (x, y) of the first grid point.
+    values : numpy.ndarray
+        The signed distances at the grid points, indexed [row (y), column (x)].
+    error_bound : float
+        The most that an interpolated clearance can differ from the true one (the distance is
+        1-Lipschitz, and every grid point of a cell is within this distance of the points in it).
+    """
+
+    # Bumped whenever the way the field is computed changes, so old cache files aren't used
+    VERSION = 1
+
+    def __init__(self, obstacle_geometries, resolution = 10, margin = 1000, cache_dir = "cache"):
+        self.obstacle_geometries = obstacle_geometries
+        self.obstacle_index = shapely.STRtree(obstacle_geometries)
+        self.resolution = resolution
+        self.margin = margin
+        self.error_bound = resolution * math.sqrt(2)
+        bounds = shapely.total_bounds(obstacle_geometries)
+        self.origin = np.floor((bounds[:2] - margin) / resolution) * resolution
+        shape = (np.ceil((bounds[2:] + margin - self.origin) / resolution).astype(int) + 1)[::-1]
+        cache_file = None if cache_dir is None else os.path.join(cache_dir, f"clearance_{self.cache_key(shape)}.npy")
+        self.values = None if cache_file is None else self.load_cache(cache_file, shape)
+        if self.values is None:
+            self.values = self.compute(shape)
+            if cache_file is not None:
+                self.save_cache(cache_file)
+
+    def cache_key(self, shape):
+        digest = hashlib.sha256()
+        digest.update(f"{self.VERSION}:{self.resolution}:{self.margin}:{tuple(self.origin)}:{tuple(shape)}".encode())
+        for geometry in self.obstacle_geometries:
+            digest.update(shapely.get_coordinates(geometry).tobytes())
+        return digest.hexdigest()[:16]
+
+    def load_cache(self, cache_file, shape):
+        # A cache file that can't be read (e.g. truncated by a run that was killed) is computed again
+        if not os.path.exists(cache_file):
+            return None
+        try:
+            values = np.load(cache_file)
+        except (OSError, ValueError, EOFError):
+            return None
+        return values if values.shape == tuple(shape) else None
+
+    def save_cache(self, cache_file):
+        # Write to a temporary file next to the cache file and move it into place, so that parallel
+        # runs never load a partly written file
+        cache_dir = os.path.dirname(cache_file)
+        os.makedirs(cache_dir, exist_ok = True)
+        with tempfile.NamedTemporaryFile(dir = cache_dir, suffix = ".npy.tmp", delete = False) as file:
+            np.save(file, self.values)
+        os.replace(file.name, cache_file)
+
+    def compute(self, shape):
+        """ Rasterize the obstacles into signed distances on the grid """
+        rows, columns = shape
+        x, y = np.meshgrid(self.origin[0] + np.arange(columns) * self.resolution, self.origin[1] + np.arange(rows) * self.resolution)
+        points = shapely.points(x.ravel(), y.ravel())
+        values = self.exact_clearance(points)
+        # Inside the obstacles, measure to the coastline of the land they make up
+        inside = values == 0
+        if np.any(inside):
+            coastline = shapely.union_all(self.obstacle_geometries).boundary
+            shapely.prepare(coastline)
+            values[inside] = -shapely.distance(points[inside], coastline)
+        return values.reshape(shape)
+
+    def exact_clearance(self, points):
+        # The distance from each point to the nearest obstacle (0 inside one)
+        (point_indices, _), distances = self.obstacle_index.query_nearest(points, return_distance = True)
+        values = np.full(len(points), np.inf)
+        np.minimum.at(values, point_indices, distances)
+        return values
+
+    def cells(self, x, y):
+        # The grid cell of each point and the position of the point within it, and which points are on the grid
+        fx = (np.asarray(x, dtype = float) - self.origin[0]) / self.resolution
+        fy = (np.asarray(y, dtype = float) - self.origin[1]) / self.resolution
+        on_grid = (fx >= 0) & (fy >= 0) & (fx <= self.values.shape[1] - 1) & (fy <= self.values.shape[0] - 1)
+        column = np.clip(np.floor(fx).astype(int), 0, self.values.shape[1] - 2)
+        row = np.clip(np.floor(fy).astype(int), 0, self.values.shape[0] - 2)
+        return column, row, fx - column, fy - row, on_grid
+
+    def clearance(self, x, y):
+        """
+        Get the signed distance to the nearest obstacle at one or more points.
+
+        Parameters:
+        -----------
+        x : float or numpy.ndarray
+            The x-coordinates of the points.
+        y : float or numpy.ndarray
+            The y-coordinates of the points.
+
+        Returns:
+        --------
+        float or numpy.ndarray
+            The distance to the nearest obstacle (negative inside one), within `error_bound`.
+        """
+        column, row, tx, ty, on_grid = self.cells(x, y)
+        v = self.values
+        values = (
+            (1 - ty) * ((1 - tx) * v[row, column] + tx * v[row, column + 1])
+            + ty * ((1 - tx) * v[row + 1, column] + tx * v[row + 1, column + 1])
+        )
+        if not np.all(on_grid):
+            values = np.array(values, dtype = float)
+            points = shapely.points(np.broadcast_to(x, values.shape)[~on_grid], np.broadcast_to(y, values.shape)[~on_grid])
+            values[~on_grid] = self.exact_clearance(np.atleast_1d(points))
+        return values if np.ndim(values) > 0 else float(values)
+
+    def gradient(self, x, y):
+        """
+        Get the gradient of the signed distance (the direction away from the nearest obstacle) at one or more points.
+
+        Parameters:
+        -----------
+        x : float or numpy.ndarray
+            The x-coordinates of the points.
+        y : float or numpy.ndarray
+            The y-coordinates of the points.
+
+        Returns:
+        --------
+        numpy.ndarray
+            The (dx, dy) gradient at each point, in the last axis.
+        """
+        column, row, tx, ty, on_grid = self.cells(x, y)
+        v = self.values
+        dx = ((1 - ty) * (v[row, column + 1] - v[row, column]) + ty * (v[row + 1, column + 1] - v[row + 1, column])) / self.resolution
+        dy = ((1 - tx) * (v[row + 1, column] - v[row, column]) + tx * (v[row + 1, column + 1] - v[row, column + 1])) / self.resolution
+        gradients = np.stack([dx, dy], axis = -1)
+        if not np.all(on_grid):
+            # Off the grid, point straight away from the nearest obstacle
+            gradients = gradients.reshape(-1, 2)
+            off_grid = np.flatnonzero(np.broadcast_to(~on_grid, np.shape(dx)).ravel())
+            px = np.broadcast_to(x, np.shape(dx)).ravel()[off_grid]
+            py = np.broadcast_to(y, np.shape(dx)).ravel()[off_grid]
+            points = shapely.points(px, py)
+            nearest = self.obstacle_geometries[self.obstacle_index.nearest(points)]
+            nearest_points = shapely.get_coordinates(shapely.shortest_line(points, nearest))[1::2]
+            away = np.stack([px, py], axis = 1) - nearest_points
+            gradients[off_grid] = away / np.hypot(away[:, 0], away[:, 1])[:, None]
+            gradients = gradients.reshape(np.shape(dx) + (2,))
+        return gradients
@@ -0,0 +1,120 @@
+import operator
+
+# Comparison operators that can be used in a condition mapping, e.g. {"gt": 5} or {">": 5}
+COMPARISONS = {
+    "eq": operator.eq, "==": operator.eq,
+    "ne": operator.ne, "!=": operator.ne,
+    "lt": operator.lt, "<": operator.lt,
+    "le": operator.le, "<=": operator.le,
+    "gt": operator.gt, ">": operator.gt,
+    "ge": operator.ge, ">=": operator.ge,
+}
+
+def compile_conditions(root, conditions):
+    """ Compile a set of success or failure conditions into a single check
+
+    The set is satisfied when any of its conditions is satisfied. Every attribute path is resolved
+    once, here, so evaluating the returned check never parses a path or walks the object tree.
+
+    Supported forms (mixed freely):
+
+        World:PrimaryBattleship:out_of_bounds: true             # equality
+        World:PrimaryBattleship:current_speed: {lt: 1}          # thresholds (eq, ne, lt, le, gt, ge), ANDed
+        World:PrimaryBattleship: {within: 200, of: [1204, 1714]}   # within N meters of a point
+        World:PrimaryBattleship: {within: 500, of: World:AircraftCarrier}   # ... or of another object
+        any: [{...}, {...}]                                     # any of the nested condition sets
+        all: [{...}, {...}]                                     # all of the nested condition sets
+
+    Parameters
+    ----------
+    root : GetterSetter
+        The object the attribute paths are resolved from (usually the Simulator)
+    conditions : dict
+        The condition set, as loaded from the scenario YAML
+
+    Returns
+    -------
+    callable
+        A function without arguments that returns True when the condition set is satisfied
+    """
+    checks = [compile_condition(root, key, value) for key, value in conditions.items()]
+    if len(checks) == 1:
+        return checks[0]
+    return lambda: any(check() for check in checks)
+
+def compile_condition(root, key, value):
+    """ Compile a single condition entry
+
+    Parameters
+    ----------
+    root : GetterSetter
+        The object the attribute paths are resolved from
+    key : str
+        The attribute path, or "any"/"all" for a composite condition
+    value : object
+        The expected value, a mapping of predicates, or a list of nested condition sets
+
+    Returns
+    -------
+    callable
+        A function without arguments that returns True when the condition is satisfied
+    """
+    if key in ("any", "all"):
+        if type(value) is not list:
+            raise RuntimeError(f"The '{key}' condition expects a list of condition sets")
+        checks = [compile_conditions(root, nested) for nested in value]
+        if key == "any":
+            return lambda: any(check() for check in checks)
+        return lambda: all(check() for check in checks)
+    if type(value) is not dict:
+        owner, attribute = root.resolve_owner(key)
+        getter = operator.attrgetter(attribute)
+        return lambda: getter(owner) == value
+    predicates = []
+    for predicate_name, operand in value.items():
+        if predicate_name == "within":
+            predicates.append(compile_within(root, key, operand, value.get("of")))
+        elif predicate_name == "of":
+            if "within" not in value:
+                raise RuntimeError(f"The condition on '{key}' has 'of' without 'within'")
+        elif predicate_name in COMPARISONS:
+            owner, attribute = root.resolve_owner(key)
+            predicates.append(compile_comparison(owner, attribute, COMPARISONS[predicate_name], operand))
+        else:
+            raise RuntimeError(f"Unknown predicate '{predicate_name}' in the condition on '{key}'")
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda: all(predicate() for predicate in predicates)
+
+def compile_comparison(owner, attribute, comparison, operand):
+    getter = operator.attrgetter(attribute)
+    return lambda: comparison(getter(owner), operand)
+
+def compile_within(root, key, distance, target):
+    """ Compile a "within N meters of" predicate
+
+    Parameters
+    ----------
+    root : GetterSetter
+        The object the attribute paths are resolved from
+    key : str
+        The path to an object with x and y attributes (e.g. "World:PrimaryBattleship")
+    distance : float
+        The distance threshold, in meters
+    target : list or str
+        An [x, y] point, or the path to another object with x and y attributes
+
+    Returns
+    -------
+    callable
+        A function without arguments that returns True when the object is within the distance
+    """
+    if target is None:
+        raise RuntimeError(f"The 'within' condition on '{key}' needs an 'of' point or object")
+    owner = root.resolve_owner(f"{key}:x")[0]
+    squared_distance = distance ** 2
+    if type(target) is str:
+        target_owner = root.resolve_owner(f"{target}:x")[0]
+        return lambda: (owner.x - target_owner.x) ** 2 + (owner.y - target_owner.y) ** 2 <= squared_distance
+    target_x, target_y = target
+    return lambda: (owner.x - target_x) ** 2 + (owner.y - target_y) ** 2 <= squared_distance
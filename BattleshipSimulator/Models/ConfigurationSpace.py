@@ -0,0 +1,55 @@
+import shapely
+
+class ConfigurationSpaceMap:
+    """
+    Inflated (buffered) copies of the obstacles that the ships see, shared by every ship in a World.
+
+    Each inflated obstacle is keyed by the obstacle's shape and the inflation distance, so an
+    obstacle that is seen again unchanged (e.g. one that is wholly within radar range on the
+    next tick, or seen by another ship of the same size) is only buffered once.
+
+    Attributes:
+    -----------
+    max_entries : int
+        The most inflated obstacles that are kept; the oldest are dropped first.
+    hits : int
+        How many lookups were answered from the map.
+    misses : int
+        How many lookups had to buffer the obstacle.
+    """
+
+    def __init__(self, max_entries = 4096):
+        self.max_entries = max_entries
+        self.inflated = {}
+        self.hits = 0
+        self.misses = 0
+
+    def inflate(self, geometry, distance):
+        """
+        Get an obstacle grown by a distance in every direction.
+
+        Parameters:
+        -----------
+        geometry : Polygon
+            The obstacle.
+        distance : float
+            The distance to grow it by.
+
+        Returns:
+        --------
+        tuple
+            The inflated obstacle, and the coordinates of its exterior (shared by every caller, so
+            they must be treated as read-only).
+        """
+        key = (shapely.to_wkb(geometry), distance)
+        entry = self.inflated.get(key)
+        if entry is None:
+            self.misses += 1
+            inflated = geometry.buffer(distance)
+            entry = (inflated, list(inflated.exterior.coords))
+            if len(self.inflated) >= self.max_entries:
+                del self.inflated[next(iter(self.inflated))]
+            self.inflated[key] = entry
+        else:
+            self.hits += 1
+        return entry
@@ -2,38 +2,70 @@ import BattleshipSimulator.Models.BattleshipModel as BattleModel
 from BattleshipSimulator.Models.GetterSetter import GetterSetter
 import BattleshipSimulator.Models.BattleshipSystem as BattleSystem
 import BattleshipSimulator.Models.SimulatorUtilities as SimulatorUtilities
+import BattleshipSimulator.Models.Conditions as Conditions
 from BattleshipSimulator.Models.Logger import CSVLogger
+from BattleshipSimulator.Models.WorldState import WorldState
+from BattleshipSimulator.Models.ClearanceField import ClearanceField
+from BattleshipSimulator.Models.ConfigurationSpace import ConfigurationSpaceMap
+from BattleshipSimulator.Models.Roadmap import VisibilityGraph
+from BattleshipSimulator.Models.Sensing import ContactGrid, WorldSensor
+from BattleshipSimulator.Supervisor.Navigators import RemoteSupervisorBatch
+import copy
 import datetime
+import numpy as np
+import pickle
+import shapely
 import time
 
 class Simulator(GetterSetter):
 
-    def __init__(self, config_file):
+    def __init__(self, config_file, zmq_port = 5556, config_data = None):
         super().__init__()
         self.config_file = config_file
-        self.success_conditions = {}
-        self.failure_conditions = {}
+        # An already loaded (e.g. perturbed) scenario can be given instead of reading the config file
+        self.config_data = config_data
+        self.zmq_port = zmq_port
+        self.logger = CSVLogger(self.results_filename(), zmq_port = self.zmq_port)
+        self.add_child("Logger", self.logger)
+        # The world settings and the geometry built from them, kept across restarts
+        self.static_geometry = None
+        try:
+            self.setup()
+        except Exception:
+            # Don't leave the results file of a scenario that couldn't be built open
+            self.close_log("Error")
+            raise
+
+    def results_filename(self):
         # Format the date and time in a filename-safe way
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
-        self.logger = CSVLogger(f"results/{timestamp}_{SimulatorUtilities.get_filename_without_extension(config_file)}_results.csv")
-        self.add_child("Logger", self.logger)
-        self.setup()
+        return f"results/{timestamp}_{SimulatorUtilities.get_filename_without_extension(self.config_file)}_results.csv"
     
     def setup(self):
         self.total_time = 0
         self.timedelta = 0
+        self.success_conditions = {}
+        self.failure_conditions = {}
         self.logging_variables = ["total_time", "timedelta", "simulation_status"]
+        self.snapshot_variables = ["total_time", "timedelta", "simulation_running", "simulation_paused", "simulation_status"]
         #TODO: move scenario logic outside of the controller, where it belongs
-        config_data = SimulatorUtilities.load_yaml(self.config_file)
-        # Create the world where the models will exist
+        # The parsed scenario is cached, so restarting doesn't read and parse the YAML files again
+        config_data = SimulatorUtilities.load_yaml_template(self.config_file) if self.config_data is None else self.config_data
+        # Create the world where the models will exist, reusing the obstacle geometry if the world is unchanged
         world_kwargs = {} if "world" not in config_data else config_data["world"]
-        self.world = World(**world_kwargs)
+        static_geometry = None
+        if self.static_geometry is not None and self.static_geometry[0] == world_kwargs:
+            static_geometry = self.static_geometry[1]
+        self.world = World(static_geometry = static_geometry, **world_kwargs)
+        self.static_geometry = (world_kwargs, self.world.static_geometry())
         self.add_child("World", self.world)
         # Create the models
         if "entities" in config_data:
             for entity in config_data["entities"]:
+                # The cached templates are shared, so work on copies of them
+                entity = copy.deepcopy(entity)
                 # Load the generic config
-                battleship_config = SimulatorUtilities.load_yaml(entity["_configuration"])
+                battleship_config = copy.deepcopy(SimulatorUtilities.load_yaml_template(entity["_configuration"]))
                 # Add or overwrite variables that are in the entity config into the battleship config
                 battleship_config = self.recursive_key_update(battleship_config, {k:v for k,v in entity.items() if k[0] != "_"})
                 battleship_config["world"] = self.world
@@ -59,9 +91,14 @@ class Simulator(GetterSetter):
                     self.success_conditions[condition_variable] = condition_value
                 else:
                     self.failure_conditions[condition_variable] = condition_value
+        # Resolve every condition once so checking them each tick doesn't parse attribute paths
+        self.success_check = Conditions.compile_conditions(self, self.success_conditions)
+        self.failure_check = Conditions.compile_conditions(self, self.failure_conditions)
         self.simulation_running = False
         self.simulation_paused = False
         self.simulation_status = "Unknown"
+        # The set of logged variables is fixed once the scenario is built
+        self.logger.set_schema(self.logging_schema())
     
     def update(self, timedelta):
         if self.simulation_running and not self.simulation_paused:
@@ -69,24 +106,31 @@ class Simulator(GetterSetter):
             self.timedelta = timedelta
             self.world.update(timedelta)
             # Check for success
-            for condition_variable, condition_value in self.success_conditions.items():
-                if self.get_attribute(condition_variable) == condition_value:
-                    self.terminate(0)
-                    break
+            if self.success_check():
+                self.terminate(0)
             # Check for failure (if it hasn't already succeeded)
-            if self.simulation_running:
-                for condition_variable, condition_value in self.failure_conditions.items():
-                    if self.get_attribute(condition_variable) == condition_value:
-                        self.terminate(1)
-                        break
+            elif self.failure_check():
+                self.terminate(1)
             if self.simulation_running and self.total_time > (12 * 60 * 60):
                 self.terminate(2)
             
-            self.logger.log(self.logging_package())
+            self.logger.log_schema()
             # Check if the simulator has stopped
             if not self.simulation_running:
-                self.logger.close()
-                self.logger.rename_file(self.logger.filename[:-4] + f"_{self.simulation_status}.csv")
+                self.close_log(self.simulation_status)
+
+    def close_log(self, status):
+        """
+        Close the results file of the run, and add the outcome to its name.
+
+        Parameters:
+        -----------
+        status : str
+            The outcome of the run (e.g. "Success", or "Error" if the run was abandoned).
+        """
+        if self.logger.file_open:
+            self.logger.close()
+            self.logger.rename_file(self.logger.filename[:-4] + f"_{status}.csv")
     
     def start(self):
         self.start_time = time.time()
@@ -109,14 +153,44 @@ class Simulator(GetterSetter):
                 self.simulation_status = "Fail-Timeout"
     
     def restart(self):
-        self.__init__(self.config_file)
+        # Keep the logger (and its telemetry socket) and the obstacle geometry, and rebuild the ships
+        # and conditions from the cached template
+        self.logger.reopen(self.results_filename())
+        self.remove_child("World")
+        self.setup()
     
-    def logging_package(self):
-        logging_package = {k: getattr(self, k) for k in self.logging_variables}
-        world_log_package = self.world.logging_package()
-        for k, v in world_log_package.items():
-            logging_package[f"World.{k}"] = v
-        return logging_package
+    def snapshot(self):
+        """
+        Capture the full mutable state of the scenario in a compact binary form.
+
+        Returns:
+        --------
+        bytes
+            The pickled state, which can be restored any number of times with `restore`.
+        """
+        return pickle.dumps(self.snapshot_state(), pickle.HIGHEST_PROTOCOL)
+
+    def restore(self, snapshot):
+        """
+        Rewind the scenario to a state captured by `snapshot`.
+
+        The logger is not rewound; if the run has finished, logging continues in a new results file.
+
+        Parameters:
+        -----------
+        snapshot : bytes
+            A snapshot taken from this run (or from the run it was restarted or restored from).
+        """
+        self.restore_state(pickle.loads(snapshot))
+        if not self.logger.file_open:
+            self.logger.reopen(self.results_filename())
+            self.logger.set_schema(self.logging_schema())
+
+    def logging_schema(self):
+        logging_schema = [(k, self, k) for k in self.logging_variables]
+        for k, owner, attribute in self.world.logging_schema():
+            logging_schema.append((f"World.{k}", owner, attribute))
+        return logging_schema
 
     def recursive_key_update(self, configuration, update_dict):
         for key, value in update_dict.items():
@@ -130,27 +204,119 @@ class Simulator(GetterSetter):
 
 class World(GetterSetter):
 
+    # The attributes that only depend on the obstacles (see static_geometry)
+    STATIC_ATTRIBUTES = ["obstacle_geometries", "obstacle_index", "obstacle_bounds", "obstacle_circles", "clearance_field", "configuration_space", "roadmaps"]
+
     def __init__(self, **kwargs):
         super().__init__()
         # Generate objects that are in the way - make this better in the future
         self.obstacles = [] if "obstacles" not in kwargs else kwargs["obstacles"]
+        # The geometry that only depends on the obstacles can be taken from another World of the same
+        # scenario (see static_geometry), e.g. when the scenario is restarted
+        static_geometry = None if "static_geometry" not in kwargs else kwargs["static_geometry"]
+        if static_geometry is None:
+            self.build_static_geometry(**kwargs)
+        else:
+            for k in self.STATIC_ATTRIBUTES:
+                setattr(self, k, static_geometry[k])
         self.logging_variables = []
         self.models = {}
+        # The dynamics state of every ship, stored as contiguous arrays so they can be stepped together
+        self.state = WorldState()
+        # Senses the surroundings of every ship at once
+        self.sensor = WorldSensor(self)
+        # Where the ships' hulls are, rebuilt by the sensor every tick
+        self.contact_grid = ContactGrid(1000 if "contact_cell_size" not in kwargs else kwargs["contact_cell_size"])
+        # The remote supervisors that are asked about all of their ships in one request, by URL
+        self.remote_batches = {}
+
+    def build_static_geometry(self, **kwargs):
+        # The obstacles never move, so build (and prepare) their geometries and index them once;
+        # a query returns positions in self.obstacles and self.obstacle_geometries
+        self.obstacle_geometries = np.array([shapely.Polygon(obstacle) for obstacle in self.obstacles], dtype = object)
+        shapely.prepare(self.obstacle_geometries)
+        self.obstacle_index = shapely.STRtree(self.obstacle_geometries)
+        # The bounding boxes (min x, min y, max x, max y) and bounding circles (x, y, radius) of the obstacles,
+        # which let the sensing pass reject most candidates before any exact geometry test
+        self.obstacle_bounds = shapely.bounds(self.obstacle_geometries).reshape(-1, 4)
+        self.obstacle_circles = SimulatorUtilities.bounding_circles(self.obstacle_geometries)
+        # Optionally, a signed distance field of the obstacles, at a resolution of clearance_resolution meters
+        self.clearance_field = None
+        clearance_resolution = None if "clearance_resolution" not in kwargs else kwargs["clearance_resolution"]
+        if clearance_resolution is not None and len(self.obstacles) > 0:
+            self.clearance_field = ClearanceField(
+                self.obstacle_geometries,
+                clearance_resolution,
+                1000 if "clearance_margin" not in kwargs else kwargs["clearance_margin"],
+                "cache" if "clearance_cache" not in kwargs else kwargs["clearance_cache"]
+            )
+        # The obstacles the ships have seen, inflated for the navigators
+        self.configuration_space = ConfigurationSpaceMap()
+        # The roadmaps of the path planners, by clearance and bounds (built once, on first use)
+        self.roadmaps = {}
+
+    def static_geometry(self):
+        """
+        Get the geometry that only depends on the obstacles, to build another World of the same scenario with.
+
+        Returns:
+        --------
+        dict
+            The obstacle geometries, their index, bounds and bounding circles, the clearance field,
+            and the inflated obstacles and roadmaps built so far.
+        """
+        return {k: getattr(self, k) for k in self.STATIC_ATTRIBUTES}
+
+    def snapshot_state(self):
+        state = super().snapshot_state()
+        state["dynamics"] = self.state.snapshot()
+        return state
+
+    def restore_state(self, state):
+        super().restore_state(state)
+        self.state.restore(state["dynamics"])
     
     def update(self, timedelta):
+        # Sense for every ship at once; each RadarSonar picks up its results when it is updated
+        self.sensor.sense()
+        # Update the systems of every ship, so the batched remote supervisors are sent this tick's state
         for model in self.models.values():
-            model.update(timedelta)
+            model.update_systems(timedelta)
+        for batch in self.remote_batches.values():
+            batch.exchange()
+        # Decide on a heading for every ship (in order, as the ships sense each other)
+        moving_models = [model for model in self.models.values() if model.decide()]
+        if len(moving_models) > 0:
+            # Advance every moving ship in a single vectorized call
+            sim_data = self.state.step([model.state_index for model in moving_models], [model.chosen_heading for model in moving_models], timedelta)
+            for model, model_sim_data in zip(moving_models, sim_data):
+                model.complete_update(model_sim_data)
     
-    def logging_package(self):
-        logging_package = {k: getattr(self, k) for k in self.logging_variables}
+    def logging_schema(self):
+        logging_schema = [(k, self, k) for k in self.logging_variables]
         for model_name, model in self.models.items():
-            model_log_package = model.logging_package()
-            for k, v in model_log_package.items():
-                logging_package[f"{model_name}.{k}"] = v
-        return logging_package
+            for k, owner, attribute in model.logging_schema():
+                logging_schema.append((f"{model_name}.{k}", owner, attribute))
+        return logging_schema
 
     def attach_model(self, model_id, model):
         if model_id in self.models:
             raise KeyError(f"The world already has a model with an ID of '{model_id}' assigned")
         self.models[model_id] = model
-        self.add_child(model_id, model)
\ No newline at end of file
+        self.add_child(model_id, model)
+        model.attach_state(self.state)
+        if model.supervisor is not None:
+            model.supervisor.attach(self, model_id)
+
+    def get_remote_batch(self, url, timeout):
+        if url not in self.remote_batches:
+            self.remote_batches[url] = RemoteSupervisorBatch(url, timeout)
+        # The ships share one request, so it waits for the most patient of them
+        self.remote_batches[url].timeout = max(self.remote_batches[url].timeout, timeout)
+        return self.remote_batches[url]
+
+    def get_roadmap(self, clearance, bounds = None):
+        key = (clearance, None if bounds is None else tuple(bounds))
+        if key not in self.roadmaps:
+            self.roadmaps[key] = VisibilityGraph(self.obstacle_geometries, clearance, key[1])
+        return self.roadmaps[key]
\ No newline at end of file
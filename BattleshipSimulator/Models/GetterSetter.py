@@ -1,49 +1,178 @@
 class GetterSetter:
 
+    # Incremented whenever a child is added to or removed from any object tree, which invalidates
+    # every resolved AttributeHandle (creating an object doesn't, as it isn't in a tree yet)
+    tree_generation = 0
+
+    # The mutable attributes captured by snapshot_state, and the append-only lists that are
+    # captured by their length only (subclasses override these)
+    snapshot_variables = []
+    snapshot_histories = []
+
     def  __init__(self):
         self.children = {}
         self.parent = None
-    
+        self.resolved_handles = {}
+
     def add_child(self, child_name, child_object):
         if child_name in self.children:
             raise KeyError(f"This object already has a '{child_name}' child")
         self.children[child_name] = child_object
         child_object.parent = self
-    
+        GetterSetter.tree_generation += 1
+
+    def remove_child(self, child_name):
+        child_object = self.children.pop(child_name)
+        child_object.parent = None
+        GetterSetter.tree_generation += 1
+        return child_object
+
     def get_children(self):
         return [k for k in self.children]
-    
+
     def get_child(self, child_name):
         return self.children[child_name]
 
+    def resolve(self, variable_name):
+        """ Compile an attribute path into a cached handle
+
+        The handle walks the path once and then reads or writes the attribute directly. It is
+        re-resolved automatically if add_child or remove_child changes the object tree.
+
+        Parameters
+        ----------
+        variable_name : str
+            A colon-separated attribute path, e.g. "World:PrimaryBattleship:RadarSonar:collision_warning"
+
+        Returns
+        -------
+        AttributeHandle
+            The handle for the path (shared by every caller that resolves the same path on this object)
+        """
+        handle = self.resolved_handles.get(variable_name)
+        if handle is None:
+            handle = AttributeHandle(self, variable_name)
+            self.resolved_handles[variable_name] = handle
+        return handle
+
     def get_attribute(self, variable_name, traversed = False):
         if ":" not in variable_name:
             return getattr(self, variable_name)
+        elif traversed:
+            owner, attribute = self.resolve_owner(variable_name, traversed)
+            return getattr(owner, attribute)
         else:
-            child_name, child_variable_name = variable_name.split(":", maxsplit = 1)
-            # If the child name is in this object, continue down the tree
-            if child_name in self.children:
-                return self.children[child_name].get_attribute(child_variable_name, True)
-            # Else, if there is no calling parent, go up the tree to the parent and attempt to find a matching element
-            # If there is a calling parent, then assume that there is a typo in the tree string
-            elif self.parent is not None and not traversed:
-                return self.parent.get_attribute(variable_name)
-            else:
-                #TODO: raise a better key error
-                _ = self.children[child_name]
+            return self.resolve(variable_name).get()
 
     def set_attribute(self, variable_name, value, traversed = False):
         if ":" not in variable_name:
             setattr(self, variable_name, value)
+        elif traversed:
+            owner, attribute = self.resolve_owner(variable_name, traversed)
+            setattr(owner, attribute, value)
+        else:
+            self.resolve(variable_name).set(value)
+
+    def resolve_owner(self, variable_name, traversed = False):
+        """ Walk an attribute path once and return the object that owns the final attribute
+
+        Uses the same lookup rules as get_attribute, so the returned pair can be used to read
+        or write the attribute repeatedly without parsing the path again.
+
+        Parameters
+        ----------
+        variable_name : str
+            A colon-separated attribute path, e.g. "World:PrimaryBattleship:x"
+
+        Returns
+        -------
+        tuple
+            The owning object and the name of the attribute on it
+        """
+        if ":" not in variable_name:
+            return self, variable_name
         else:
             child_name, child_variable_name = variable_name.split(":", maxsplit = 1)
             # If the child name is in this object, continue down the tree
             if child_name in self.children:
-                self.children[child_name].set_attribute(child_variable_name, value, True)
+                return self.children[child_name].resolve_owner(child_variable_name, True)
             # Else, if there is no calling parent, go up the tree to the parent and attempt to find a matching element
             # If there is a calling parent, then assume that there is a typo in the tree string
             elif self.parent is not None and not traversed:
-                self.parent.set_attribute(variable_name, value)
+                return self.parent.resolve_owner(variable_name)
             else:
-                #TODO: raise a better key error
-                _ = self.children[child_name]
\ No newline at end of file
+                raise KeyError(f"Could not resolve '{child_name}' in the attribute path '{variable_name}'")
+
+    def snapshot_state(self):
+        """ Capture the mutable state of this object and its children
+
+        Returns
+        -------
+        dict
+            The snapshot variables, the history lengths and the states of the children. It
+            shares objects with the live tree, so it should be serialized (e.g. pickled) right away.
+        """
+        state = {
+            "variables": {k: getattr(self, k) for k in self.snapshot_variables},
+            "histories": {k: len(getattr(self, k)) for k in self.snapshot_histories},
+            "children": {}
+        }
+        for child_name, child in self.children.items():
+            child_state = child.snapshot_state()
+            if child_state["variables"] or child_state["histories"] or child_state["children"]:
+                state["children"][child_name] = child_state
+        return state
+
+    def restore_state(self, state):
+        """ Restore a state captured by snapshot_state
+
+        Histories are truncated back to their captured length, so a state can only be restored
+        into the run it was captured from (or another run branched from the same point).
+
+        Parameters
+        ----------
+        state : dict
+            The captured state; its values are used as they are, not copied
+        """
+        for k, v in state["variables"].items():
+            setattr(self, k, v)
+        for k, length in state["histories"].items():
+            history = getattr(self, k)
+            if len(history) < length:
+                raise RuntimeError(f"Cannot restore '{k}' to {length} entries, only {len(history)} have been recorded")
+            del history[length:]
+        for child_name, child_state in state["children"].items():
+            self.children[child_name].restore_state(child_state)
+
+class AttributeHandle:
+    """
+    A compiled attribute path, bound to the object that owns the attribute.
+
+    Attributes:
+    -----------
+    root : GetterSetter
+        The object the path is resolved from.
+    path : str
+        The colon-separated attribute path.
+    """
+
+    __slots__ = ["root", "path", "owner", "attribute", "generation"]
+
+    def __init__(self, root, path):
+        self.root = root
+        self.path = path
+        self.bind()
+
+    def bind(self):
+        self.owner, self.attribute = self.root.resolve_owner(self.path)
+        self.generation = GetterSetter.tree_generation
+
+    def get(self):
+        if self.generation != GetterSetter.tree_generation:
+            self.bind()
+        return getattr(self.owner, self.attribute)
+
+    def set(self, value):
+        if self.generation != GetterSetter.tree_generation:
+            self.bind()
+        setattr(self.owner, self.attribute, value)
@@ -3,25 +3,156 @@ import csv
 import os
 import zmq
 import json
+import numpy as np
 from icecream import ic
 ic.configureOutput(includeContext=True, contextAbsPath=True)
 
+class LogColumn:
+    """
+    Growable storage for one logged variable.
+
+    Scalars are kept in typed NumPy arrays (bool, int or float), lists (e.g. polygons and waypoints)
+    are flattened into a single list indexed by row offsets, and anything else is kept as objects.
+    The storage is promoted to a more general kind if a value doesn't fit the current one.
+    """
+
+    INITIAL_CAPACITY = 1024
+    SCALAR_DTYPES = {"bool": bool, "int": np.int64, "float": np.float64}
+
+    def __init__(self):
+        self.kind = None
+        self.length = 0
+        self.values = None
+        self.offsets = None
+
+    def append(self, value):
+        value_type = type(value)
+        if self.kind is None:
+            self.kind = self.kind_of(value_type)
+            self.allocate()
+        elif not self.accepts(value_type):
+            self.promote(value_type)
+        if self.kind in self.SCALAR_DTYPES:
+            if self.length == len(self.values):
+                self.values = np.concatenate([self.values, np.empty(len(self.values), self.values.dtype)])
+            self.values[self.length] = value
+        elif self.kind == "ragged":
+            if self.length + 1 == len(self.offsets):
+                self.offsets = np.concatenate([self.offsets, np.empty(len(self.offsets), np.int64)])
+            self.values.extend(value)
+            self.offsets[self.length + 1] = len(self.values)
+        else:
+            self.values.append(value.copy() if value_type is list or value_type is dict else value)
+        self.length += 1
+
+    def get(self, index):
+        if self.kind in self.SCALAR_DTYPES:
+            return self.values[index].item()
+        elif self.kind == "ragged":
+            return self.values[self.offsets[index]:self.offsets[index + 1]]
+        else:
+            value = self.values[index]
+            return value.copy() if type(value) is list or type(value) is dict else value
+
+    def kind_of(self, value_type):
+        if value_type is bool or value_type is np.bool_:
+            return "bool"
+        elif value_type is int or value_type is np.int64:
+            return "int"
+        elif value_type is float or value_type is np.float64:
+            return "float"
+        elif value_type is list:
+            return "ragged"
+        return "object"
+
+    def accepts(self, value_type):
+        kind = self.kind_of(value_type)
+        return kind == self.kind or self.kind == "object" or (self.kind == "float" and kind == "int")
+
+    def allocate(self):
+        if self.kind in self.SCALAR_DTYPES:
+            self.values = np.empty(self.INITIAL_CAPACITY, self.SCALAR_DTYPES[self.kind])
+        elif self.kind == "ragged":
+            self.values = []
+            self.offsets = np.zeros(self.INITIAL_CAPACITY, np.int64)
+        else:
+            self.values = []
+
+    def promote(self, value_type):
+        existing = [self.get(i) for i in range(self.length)]
+        if self.kind == "int" and self.kind_of(value_type) == "float":
+            self.kind = "float"
+            self.values = np.empty(max(self.INITIAL_CAPACITY, 2 * self.length), np.float64)
+            self.values[:self.length] = existing
+        else:
+            self.kind = "object"
+            self.values = existing
+            self.offsets = None
+
 class CSVLogger(GetterSetter):
+
+    # Telemetry sockets, keyed by port. They are shared by every logger in the process, so
+    # restarting a scenario (or running the next one) publishes on the already bound socket.
+    publishers = {}
+
     def __init__(self, filename, zmq_port=5556):
         super().__init__()
+        self.file_open = False
+        self.open(filename)
+
+        # ZeroMQ setup (a port of None disables telemetry, e.g. for parallel sweeps)
+        self.zmq_port = zmq_port
+        self.socket = None if self.zmq_port is None else self.get_publisher(self.zmq_port)
+
+    @classmethod
+    def get_publisher(cls, zmq_port):
+        if zmq_port not in cls.publishers:
+            socket = zmq.Context.instance().socket(zmq.PUB)
+            socket.setsockopt(zmq.LINGER, 0)
+            socket.bind(f"tcp://*:{zmq_port}")
+            cls.publishers[zmq_port] = socket
+        return cls.publishers[zmq_port]
+
+    @classmethod
+    def close_publishers(cls):
+        """ Close every telemetry socket of the process, releasing their ports """
+        for socket in cls.publishers.values():
+            # Unbind first, as closing alone releases the port in the background
+            socket.unbind(socket.last_endpoint)
+            socket.close()
+        cls.publishers = {}
+
+    def open(self, filename):
         self.filename = filename
         self.ensure_directories_exist(self.filename)
         self.file = open(self.filename, 'w', newline='')
-        self.data = []
         self.file_open = True
         self.writer = csv.writer(self.file)
+        # The fixed log schema: column names and the (object, attribute) each one is read from
+        self.keys = None
+        self.sources = None
+        self.columns = None
+        self.rows = 0
 
-        # ZeroMQ setup
-        self.context = zmq.Context()
-        self.socket = self.context.socket(zmq.PUB)
-        self.socket.bind(f"tcp://*:{zmq_port}")
+    def reopen(self, filename):
+        """
+        Start a new log file for a restarted scenario, reusing the telemetry socket.
+
+        Parameters:
+        -----------
+        filename : str
+            The path of the new log file.
+        """
+        if self.file_open:
+            self.flush()
+            self.file.close()
+        self.open(filename)
+        if self.zmq_port is not None:
+            self.socket = self.get_publisher(self.zmq_port)
 
     def publish_data(self, data):
+        if self.socket is None:
+            return
         try:
             
             json_data = json.dumps(data)
@@ -32,26 +163,50 @@ class CSVLogger(GetterSetter):
     
     @property
     def length(self):
-        return len(self.data)
+        return self.rows
 
-    def log(self, data):
-        # If the file is new (or empty), write the headers (dictionary keys)
-        if os.path.getsize(self.filename) == 0:
-            
-            self.writer.writerow(data.keys())
+    def set_schema(self, schema):
+        """
+        Fix the columns of the log so each row can be read straight into preallocated column storage.
+
+        Parameters:
+        -----------
+        schema : list of tuple
+            (column name, object, attribute name) for every logged variable, in column order.
+            Repeated column names are only logged once.
+        """
+        self.keys = []
+        self.sources = []
+        for key, owner, attribute in schema:
+            if key not in self.keys:
+                self.keys.append(key)
+                self.sources.append((owner, attribute))
+        self.columns = [LogColumn() for _ in self.keys]
+
+    def log_schema(self):
+        """Log one row by reading every variable in the schema."""
+        self.append_row([getattr(owner, attribute) for owner, attribute in self.sources])
+
+    def append_row(self, values):
+        # If the file is new, write the headers (column names)
+        if self.rows == 0:
+            self.writer.writerow(self.keys)
             self.flush()
-        
-        # Write the dictionary values
-        self.writer.writerow(data.values())
-        self.data.append(data)
+
+        # Write the row values
+        self.writer.writerow(values)
+        for column, value in zip(self.columns, values):
+            column.append(value)
+        self.rows += 1
 
         # Publish the data
-        self.publish_data(data)
+        if self.socket is not None:
+            self.publish_data(dict(zip(self.keys, values)))
     
     def get(self, index):
-        if 0 <= index < len(self.data):
-            # The original data should be immutable, so make a copy
-            return self.data[index].copy()
+        if 0 <= index < self.rows:
+            # Rebuild the row from the columns (the stored data is never handed out directly)
+            return {key: column.get(index) for key, column in zip(self.keys, self.columns)}
         else:
             print(index)
             return None
@@ -66,16 +221,15 @@ class CSVLogger(GetterSetter):
             self.file.close()
             self.file_open = False
         
-        self.socket.close()
-        self.context.term()
+        # The shared telemetry socket stays bound for the next scenario run in this process
+        self.socket = None
     
     def ensure_directories_exist(self, file_path):
         # Extract the directory part of the file path
         directory = os.path.dirname(file_path)
-        # Check if the directory already exists
-        if not os.path.exists(directory):
-            # If it doesn't exist, create it (and any necessary parent directories)
-            os.makedirs(directory)
+        # Create it (and any necessary parent directories) if it doesn't exist; parallel runs may
+        # create it at the same time, so an existing directory isn't an error
+        os.makedirs(directory, exist_ok = True)
 
     def rename_file(self, new_name):
         os.rename(self.filename, new_name)
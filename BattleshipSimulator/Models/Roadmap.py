@@ -0,0 +1,185 @@
+import heapq
+import math
+import numpy as np
+import shapely
+
+class VisibilityGraph:
+    """
+    A roadmap of the free water around the world's obstacles: the obstacles are inflated by a
+    clearance, and the corners of the inflated obstacles are linked wherever the straight line
+    between them stays clear of every inflated obstacle. The shortest path between two points
+    that keeps the clearance from every obstacle runs along these links.
+
+    The graph only depends on the obstacles, so it is built once and every path is planned on it;
+    a query only has to link its two end points into the graph.
+
+    Attributes:
+    -----------
+    clearance : float
+        The least distance that a path keeps from every obstacle, in meters.
+    bounds : tuple or None
+        The (min x, min y, max x, max y) that the corners must be within (e.g. the guardrails).
+    inflated_geometries : numpy.ndarray
+        The inflated obstacles (where they overlap, merged into one polygon).
+    nodes : numpy.ndarray
+        The (x, y) of each corner in the graph.
+    neighbours : list
+        For each node, a list of the (node, distance) pairs that it is linked to.
+    """
+
+    # The inflated obstacles are shrunk by this many meters when testing a line, so a line may run
+    # along the edge of an inflated obstacle or touch its corners
+    EDGE_TOLERANCE = .01
+
+    def __init__(self, obstacle_geometries, clearance, bounds = None, quad_segs = 2):
+        self.clearance = clearance
+        self.bounds = bounds
+        # The corners of a buffer are on the offset curve and its edges cut inside of it, so
+        # inflate a little more to keep the whole edge at the clearance
+        inflation = clearance / math.cos(math.pi / (4 * quad_segs))
+        if len(obstacle_geometries) > 0:
+            inflated = shapely.union_all(shapely.buffer(np.asarray(obstacle_geometries), inflation, quad_segs = quad_segs))
+            self.inflated_geometries = shapely.get_parts(shapely.orient_polygons(inflated))
+        else:
+            self.inflated_geometries = np.array([], dtype = object)
+        self.blocking_geometries = shapely.buffer(self.inflated_geometries, -self.EDGE_TOLERANCE)
+        shapely.prepare(self.blocking_geometries)
+        self.blocking_index = shapely.STRtree(self.blocking_geometries)
+        self.obstacle_index = shapely.STRtree(np.asarray(obstacle_geometries, dtype = object))
+        self.nodes = self.corner_nodes()
+        self.neighbours = [[] for node in self.nodes]
+        if len(self.nodes) > 1:
+            i, j = np.triu_indices(len(self.nodes), k = 1)
+            visible = ~self.blocked(self.nodes[i], self.nodes[j])
+            distances = np.hypot(*(self.nodes[j[visible]] - self.nodes[i[visible]]).T)
+            for a, b, distance in zip(i[visible].tolist(), j[visible].tolist(), distances.tolist()):
+                self.neighbours[a].append((b, distance))
+                self.neighbours[b].append((a, distance))
+
+    def corner_nodes(self):
+        # A shortest path only bends around the convex corners of the obstacles (and any corner of a hole)
+        corners = []
+        for polygon in self.inflated_geometries:
+            # Oriented counterclockwise, a convex corner of the exterior turns left
+            exterior = np.asarray(polygon.exterior.coords)[:-1]
+            edges_in = exterior - np.roll(exterior, 1, axis = 0)
+            edges_out = np.roll(exterior, -1, axis = 0) - exterior
+            corners.append(exterior[edges_in[:, 0] * edges_out[:, 1] - edges_in[:, 1] * edges_out[:, 0] > 0])
+            for interior in polygon.interiors:
+                corners.append(np.asarray(interior.coords)[:-1])
+        corners = np.concatenate(corners) if len(corners) > 0 else np.empty((0, 2))
+        if self.bounds is not None:
+            min_x, min_y, max_x, max_y = self.bounds
+            corners = corners[(corners[:, 0] > min_x) & (corners[:, 0] < max_x) & (corners[:, 1] > min_y) & (corners[:, 1] < max_y)]
+        return corners
+
+    def blocked(self, starts, ends, exemption = (set(), 0)):
+        """ Test which of the lines from starts to ends cross an inflated obstacle (see exemption) """
+        blocked = np.zeros(len(starts), dtype = bool)
+        if len(starts) == 0 or len(self.blocking_geometries) == 0:
+            return blocked
+        lines = shapely.linestrings(np.stack([starts, ends], axis = 1))
+        line_indices, geometry_indices = self.blocking_index.query(lines, predicate = "intersects")
+        ignored, least_distance = exemption
+        if len(ignored) > 0:
+            line_indices = line_indices[~np.isin(geometry_indices, list(ignored))]
+            # Within the clearance of an obstacle, a line may still not get any closer to the obstacles
+            if least_distance > self.EDGE_TOLERANCE:
+                blocked[self.obstacle_index.query(lines, predicate = "dwithin", distance = least_distance - self.EDGE_TOLERANCE)[0]] = True
+            else:
+                blocked[self.obstacle_index.query(lines, predicate = "intersects")[0]] = True
+        blocked[line_indices] = True
+        return blocked
+
+    def exemption(self, *points):
+        """
+        Find the inflated obstacles that any of the points are inside of. A line from (or to) such a
+        point may cross them, as long as it gets no closer to the obstacles than the nearest of the points.
+
+        Returns:
+        --------
+        tuple
+            The indices of the inflated obstacles, and the least distance from the points to an obstacle.
+        """
+        points = shapely.points(np.asarray(points, dtype = float))
+        ignored = set(self.blocking_index.query(points, predicate = "intersects")[1].tolist())
+        if len(ignored) == 0:
+            return (ignored, 0)
+        distances = self.obstacle_index.query_nearest(points, return_distance = True)[1]
+        return (ignored, float(np.min(distances)))
+
+    def is_visible(self, start, goal):
+        """ Test whether the straight line from start to goal keeps the clearance (see shortest_path) """
+        start = np.asarray(start, dtype = float)
+        goal = np.asarray(goal, dtype = float)
+        return not self.blocked(start[None], goal[None], self.exemption(start, goal))[0]
+
+    def shortest_path(self, start, goal):
+        """
+        Plan the shortest path from one point to another that keeps the clearance from every obstacle.
+
+        If the start or the goal is already closer to an obstacle than the clearance, the path
+        may leave (or enter) that obstacle's inflated area, as long as it gets no closer to the
+        obstacles than the start (or the goal) is.
+
+        Parameters:
+        -----------
+        start : tuple
+            The (x, y) that the path starts at.
+        goal : tuple
+            The (x, y) that the path ends at.
+
+        Returns:
+        --------
+        list or None
+            The (x, y) of each point along the path, from the start to the goal, or None if
+            there is no clear path.
+        """
+        start = np.asarray(start, dtype = float)
+        goal = np.asarray(goal, dtype = float)
+        if self.is_visible(start, goal):
+            return [tuple(start.tolist()), tuple(goal.tolist())]
+        n = len(self.nodes)
+        if n == 0:
+            return None
+        from_start = ~self.blocked(np.broadcast_to(start, (n, 2)), self.nodes, self.exemption(start))
+        to_goal = ~self.blocked(self.nodes, np.broadcast_to(goal, (n, 2)), self.exemption(goal))
+        to_goal_distances = np.hypot(*(goal - self.nodes).T)
+        heuristic = to_goal_distances.tolist()
+        # A* from the start (node -1), with the goal (node n) linked to every node that can see it
+        distances = {}
+        previous = {}
+        queue = []
+        for node in np.flatnonzero(from_start).tolist():
+            distance = math.hypot(*(self.nodes[node] - start))
+            distances[node] = distance
+            previous[node] = -1
+            heapq.heappush(queue, (distance + heuristic[node], distance, node))
+        visited = set()
+        goal_distance = math.inf
+        goal_previous = None
+        while len(queue) > 0:
+            estimate, distance, node = heapq.heappop(queue)
+            if estimate >= goal_distance:
+                break
+            if node in visited:
+                continue
+            visited.add(node)
+            if to_goal[node] and distance + to_goal_distances[node] < goal_distance:
+                goal_distance = distance + to_goal_distances[node]
+                goal_previous = node
+            for neighbour, edge_distance in self.neighbours[node]:
+                neighbour_distance = distance + edge_distance
+                if neighbour not in visited and neighbour_distance < distances.get(neighbour, math.inf):
+                    distances[neighbour] = neighbour_distance
+                    previous[neighbour] = node
+                    heapq.heappush(queue, (neighbour_distance + heuristic[neighbour], neighbour_distance, neighbour))
+        if goal_previous is None:
+            return None
+        path = [tuple(goal.tolist())]
+        node = goal_previous
+        while node != -1:
+            path.append(tuple(self.nodes[node].tolist()))
+            node = previous[node]
+        path.append(tuple(start.tolist()))
+        return path[::-1]
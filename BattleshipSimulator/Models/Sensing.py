@@ -0,0 +1,343 @@
+import BattleshipSimulator.Models.SimulatorUtilities as SimulatorUtilities
+import math
+import numpy as np
+import shapely
+
+class WorldSensor:
+    """
+    World-level sensing pass for every RadarSonar in a World.
+
+    The radar, minimum safe area and hull of every ship are tested against every nearby obstacle
+    and every other hull in a few vectorized Shapely calls. The results are handed to each
+    RadarSonar, which applies them when it is updated (so the other systems still see the
+    previous results until then, as before).
+
+    Ships are sensed in World order and see the hulls of the ships sensed before them at their
+    current pose, and the hulls of the ships after them as those ships last sensed them, which
+    matches updating each RadarSonar in turn. Other ships are looked up in the World's contact
+    grid, so a ship only sees (in its `objects`) the hulls in the cells around it.
+
+    Attributes:
+    -----------
+    world : World
+        The world whose ships are sensed.
+    """
+
+    # The largest rotation (in degrees) between two hulls of a sweep
+    MAX_SWEEP_ROTATION = 5
+
+    # Slack (in meters) added to the broad-phase tests, so rounding can't reject a target that only just touches
+    BROAD_PHASE_TOLERANCE = 1e-6
+
+    def __init__(self, world):
+        self.world = world
+        # How many contact tests (radar range and minimum safe area, per ship and target) a brute-force pass would
+        # have run, how many of them the obstacle index (or the ship contact grid) and the broad phase rejected, and
+        # how many were run exactly
+        self.test_counters = {"tests": 0, "index_culled": 0, "broad_phase_culled": 0, "exact": 0}
+
+    def radar_sonars(self):
+        return [model.children["RadarSonar"] for model in self.world.models.values() if "RadarSonar" in model.children]
+
+    def count_tests(self, n, pairs, radar_candidates, msa_candidates):
+        # Every ship could be tested against every obstacle and every other ship, for its radar and its minimum safe area;
+        # the tests that aren't paired up were rejected by the obstacle index or the ship contact grid
+        tests = 2 * n * (len(self.world.obstacles) + len(self.radar_sonars()) - 1)
+        exact = int(np.count_nonzero(radar_candidates) + np.count_nonzero(msa_candidates))
+        self.test_counters["tests"] += tests
+        self.test_counters["index_culled"] += tests - 2 * pairs
+        self.test_counters["broad_phase_culled"] += 2 * pairs - exact
+        self.test_counters["exact"] += exact
+
+    def exact_tests_avoided(self):
+        return self.test_counters["index_culled"] + self.test_counters["broad_phase_culled"]
+
+    def swept_collisions(self, sensors, poses, sensor_pairs, pair_sensors, pair_geometries, pair_coords, chart_pair_count):
+        """
+        Find what each ship's hull passed through since it was last sensed (continuous collision detection).
+
+        The hull is swept from the pose it was last sensed at to its current pose, so a ship can't pass
+        through a thin obstacle, or another ship, between two sensing passes however long the time step.
+
+        Returns:
+        --------
+        list of list
+            The coordinates of the obstacles and hulls (as in `collision_objects`) hit by each ship's sweep.
+        """
+        swept_collisions = [[] for _ in sensors]
+        moved = [i for i, sensor in enumerate(sensors) if sensor.sensed_pose != poses[i]]
+        if len(moved) == 0:
+            return swept_collisions
+        # The hull turns about the center of its bounding box, so the sweep stays within the hull's radius
+        # around that center on its way; only sweep the hulls that have something in those bounds
+        sweep_bounds = []
+        for i in moved:
+            vertices = sensors[i].hull_vertices
+            center = (vertices.min(axis = 0) + vertices.max(axis = 0)) / 2
+            radius = np.max(np.hypot(*(vertices - center).T))
+            ends = np.array([sensors[i].sensed_pose[:2], poses[i][:2]]) + center
+            sweep_bounds.append(np.concatenate([ends.min(axis = 0) - radius, ends.max(axis = 0) + radius]))
+        sweep_bounds = np.array(sweep_bounds)
+        near = np.zeros(len(moved), dtype = bool)
+        near[self.world.obstacle_index.query(shapely.box(*sweep_bounds.T))[0]] = True
+        ship_bounds = shapely.bounds(pair_geometries[chart_pair_count:]).reshape(-1, 4)
+        for k, i in enumerate(moved):
+            ship_pairs = [pair_index - chart_pair_count for pair_index in sensor_pairs[i] if pair_index >= chart_pair_count]
+            b = ship_bounds[ship_pairs]
+            near[k] |= np.any((b[:, 0] <= sweep_bounds[k, 2]) & (b[:, 2] >= sweep_bounds[k, 0]) & (b[:, 1] <= sweep_bounds[k, 3]) & (b[:, 3] >= sweep_bounds[k, 1]))
+        pieces = []
+        piece_sensors = []
+        for k, i in enumerate(moved):
+            sensor = sensors[i]
+            if near[k]:
+                sensor_pieces = SimulatorUtilities.swept_pieces(sensor.hull_vertices, sensor.sensed_pose, poses[i], self.MAX_SWEEP_ROTATION)
+                pieces.extend(sensor_pieces)
+                piece_sensors.extend([i] * len(sensor_pieces))
+        if len(pieces) == 0:
+            return swept_collisions
+        pieces = np.array(pieces, dtype = object)
+        piece_sensors = np.array(piece_sensors, dtype = int)
+        # Obstacles, in chart order
+        piece_hits = self.world.obstacle_index.query(pieces, predicate = "intersects")
+        for i, obstacle in np.unique(np.stack([piece_sensors[piece_hits[0]], piece_hits[1]], axis = 1), axis = 0).reshape(-1, 2):
+            swept_collisions[i].append(self.world.obstacles[obstacle])
+        # Other ships, as they are seen by the sensing pass
+        for i in np.unique(piece_sensors):
+            ship_pairs = [pair_index for pair_index in sensor_pairs[i] if pair_index >= chart_pair_count]
+            if len(ship_pairs) == 0:
+                continue
+            sensor_pieces = pieces[piece_sensors == i]
+            hits = shapely.intersects(pair_geometries[ship_pairs][:, None], sensor_pieces[None, :]).any(axis = 1)
+            swept_collisions[i].extend(pair_coords[pair_index] for pair_index, hit in zip(ship_pairs, hits) if hit)
+        return swept_collisions
+
+    def sense(self, sensors = None):
+        """
+        Sense the surroundings of a set of ships and hand each RadarSonar its results.
+
+        Parameters:
+        -----------
+        sensors : list of RadarSonar, optional
+            The RadarSonars to update, in order. By default, every RadarSonar in the world.
+        """
+        all_sensors = self.radar_sonars()
+        sensors = all_sensors if sensors is None else sensors
+        n = len(sensors)
+        if n == 0:
+            return
+        # Move every hull and minimum safe area to its ship's pose in one pass
+        poses = [(sensor.model.x, sensor.model.y, sensor.model.heading) for sensor in sensors]
+        dx, dy, rotation = zip(*poses)
+        vertices = SimulatorUtilities.rigid_transform_many(
+            [sensor.hull_vertices for sensor in sensors] + [sensor.minimum_safe_area_vertices for sensor in sensors],
+            dx + dx, dy + dy, rotation + rotation
+        )
+        hull_coords = [SimulatorUtilities.vertex_list(v) for v in vertices[:n]]
+        rings = shapely.linearrings(np.concatenate(vertices), indices = np.repeat(np.arange(2 * n), [len(v) for v in vertices]))
+        hulls, msas = shapely.polygons(rings[:n]), shapely.polygons(rings[n:])
+        positions = np.array([(x, y) for x, y, _ in poses], dtype = float)
+        centers = shapely.points(positions)
+        radar_ranges = np.array([sensor.radar_range for sensor in sensors], dtype = float)
+
+        # Chart obstacles whose bounds overlap the bounds of a radar range or minimum safe area (the hulls lie inside the latter)
+        radar_bounds = np.concatenate([positions - radar_ranges[:, None], positions + radar_ranges[:, None]], axis = 1)
+        msa_bounds = shapely.bounds(msas)
+        query = self.world.obstacle_index.query(np.concatenate([shapely.box(*radar_bounds.T), msas]))
+        chart_pairs = np.unique(np.stack([query[0] % n, query[1]], axis = 1), axis = 0)
+        chart_sensors, chart_obstacles = chart_pairs[:, 0], chart_pairs[:, 1]
+
+        # Pairs of sensor and target: the chart candidates of each sensor (in chart order), then the other ships
+        pair_sensors = list(chart_sensors)
+        pair_geometries = list(self.world.obstacle_geometries[chart_obstacles])
+        pair_coords = [self.world.obstacles[i] for i in chart_obstacles]
+        sensor_pairs = [[] for _ in range(n)]
+        for pair_index, sensor_index in enumerate(chart_sensors):
+            sensor_pairs[sensor_index].append(pair_index)
+        sensor_positions = {id(sensor): i for i, sensor in enumerate(sensors)}
+        sensor_objects = [[] for _ in range(n)]
+        # Grid the hulls of every ship (covering both where it was last sensed and where it is now, as it can be
+        # seen at either), and only look for ships in the cells around each ship's radar range and minimum safe area
+        contact_bounds = shapely.bounds(np.array([other.transformed_polygon for other in all_sensors], dtype = object)).reshape(-1, 4)
+        for j, other in enumerate(all_sensors):
+            if id(other) in sensor_positions:
+                new_bounds = shapely.bounds(hulls[sensor_positions[id(other)]])
+                contact_bounds[j] = np.concatenate([np.minimum(contact_bounds[j, :2], new_bounds[:2]), np.maximum(contact_bounds[j, 2:], new_bounds[2:])])
+        self.world.contact_grid.rebuild(contact_bounds)
+        search_bounds = np.concatenate([np.minimum(radar_bounds[:, :2], msa_bounds[:, :2]), np.maximum(radar_bounds[:, 2:], msa_bounds[:, 2:])], axis = 1)
+        for i, sensor in enumerate(sensors):
+            for j in self.world.contact_grid.query(search_bounds[i]):
+                other = all_sensors[j]
+                if other.model is sensor.model:
+                    continue
+                other_position = sensor_positions.get(id(other), n)
+                if other_position < i:
+                    coords, geometry = hull_coords[other_position], hulls[other_position]
+                else:
+                    coords, geometry = other.transformed_geometry, other.transformed_polygon
+                sensor_objects[i].append(coords)
+                sensor_pairs[i].append(len(pair_sensors))
+                pair_sensors.append(i)
+                pair_geometries.append(geometry)
+                pair_coords.append(coords)
+        pair_sensors = np.array(pair_sensors, dtype = int)
+        pair_geometries = np.array(pair_geometries, dtype = object)
+        ship_geometries = pair_geometries[len(chart_obstacles):]
+        pair_bounds = np.concatenate([self.world.obstacle_bounds[chart_obstacles], shapely.bounds(ship_geometries).reshape(-1, 4)])
+        pair_circles = np.concatenate([self.world.obstacle_circles[chart_obstacles], SimulatorUtilities.bounding_circles(ship_geometries)])
+
+        # Broad phase: the bounding circle and bounding box of a target must both come within radar range (a true
+        # circle, in which the radar polygon is inscribed), or both overlap those of the minimum safe area, for it
+        # to be tested exactly
+        x, y = positions[pair_sensors, 0], positions[pair_sensors, 1]
+        reach = radar_ranges[pair_sensors] + self.BROAD_PHASE_TOLERANCE
+        box_dx = np.maximum(0, np.maximum(pair_bounds[:, 0] - x, x - pair_bounds[:, 2]))
+        box_dy = np.maximum(0, np.maximum(pair_bounds[:, 1] - y, y - pair_bounds[:, 3]))
+        radar_candidates = (np.hypot(pair_circles[:, 0] - x, pair_circles[:, 1] - y) <= reach + pair_circles[:, 2]) & (np.hypot(box_dx, box_dy) <= reach)
+        sensor_msa_circles = SimulatorUtilities.bounding_circles(msas)
+        msa_circles = sensor_msa_circles[pair_sensors]
+        msa_pair_bounds = msa_bounds[pair_sensors] + self.BROAD_PHASE_TOLERANCE * np.array([-1, -1, 1, 1])
+        msa_candidates = (
+            (np.hypot(pair_circles[:, 0] - msa_circles[:, 0], pair_circles[:, 1] - msa_circles[:, 1]) <= msa_circles[:, 2] + pair_circles[:, 2] + self.BROAD_PHASE_TOLERANCE)
+            & (pair_bounds[:, 0] <= msa_pair_bounds[:, 2]) & (pair_bounds[:, 2] >= msa_pair_bounds[:, 0])
+            & (pair_bounds[:, 1] <= msa_pair_bounds[:, 3]) & (pair_bounds[:, 3] >= msa_pair_bounds[:, 1])
+        )
+        if self.world.clearance_field is not None:
+            # A minimum safe area that the clearance field shows to be clear of land can't meet any obstacle
+            field = self.world.clearance_field
+            near_land = field.clearance(sensor_msa_circles[:, 0], sensor_msa_circles[:, 1]) - field.error_bound <= sensor_msa_circles[:, 2] + self.BROAD_PHASE_TOLERANCE
+            msa_candidates[:len(chart_obstacles)] &= near_land[chart_sensors]
+        self.count_tests(n, len(pair_sensors), radar_candidates, msa_candidates)
+
+        # The contact matrices, as flat arrays over the pairs
+        radar_hits = np.zeros(len(pair_sensors), dtype = bool)
+        radar_hits[radar_candidates] = shapely.dwithin(pair_geometries[radar_candidates], centers[pair_sensors[radar_candidates]], radar_ranges[pair_sensors[radar_candidates]])
+        radar_vertices = [SimulatorUtilities.circle_vertices(x, y, r) for (x, y, _), r in zip(poses, radar_ranges)]
+        radars = np.empty(n, dtype = object)
+        in_range = np.unique(pair_sensors[radar_hits])
+        radars[in_range] = [shapely.Polygon(radar_vertices[i]) for i in in_range]
+        radar_intersections = np.empty(len(pair_sensors), dtype = object)
+        radar_intersections[radar_hits] = shapely.intersection(radars[pair_sensors[radar_hits]], pair_geometries[radar_hits])
+        msa_hits = np.zeros(len(pair_sensors), dtype = bool)
+        msa_hits[msa_candidates] = shapely.intersects(pair_geometries[msa_candidates], msas[pair_sensors[msa_candidates]])
+        msa_intersections = np.empty(len(pair_sensors), dtype = object)
+        msa_intersections[msa_hits] = shapely.intersection(msas[pair_sensors[msa_hits]], pair_geometries[msa_hits])
+        hull_hits = np.zeros(len(pair_sensors), dtype = bool)
+        hull_hits[msa_hits] = shapely.intersects(pair_geometries[msa_hits], hulls[pair_sensors[msa_hits]])
+        swept_collisions = self.swept_collisions(sensors, poses, sensor_pairs, pair_sensors, pair_geometries, pair_coords, len(chart_obstacles))
+
+        # Gather the contacts of every ship, then measure them all at once
+        results = []
+        contacts = []
+        for i, sensor in enumerate(sensors):
+            result = {
+                "sensed_pose": poses[i],
+                "transformed_geometry": hull_coords[i],
+                "transformed_polygon": hulls[i],
+                "radar_geometry": SimulatorUtilities.vertex_list(radar_vertices[i]),
+                "objects": sensor_objects[i],
+                "radar_objects": [],
+                "radar_geometries": [],
+                "radar_object_distances": [],
+                "radar_object_summaries": [],
+                "warning_objects": [],
+                "warning_geometries": [],
+                "warning_object_distances": [],
+                "warning_object_summaries": [],
+                "collision_objects": [],
+                "collision_warning": False,
+                "collision_event": False
+            }
+            for pair_index in sensor_pairs[i]:
+                if radar_hits[pair_index]:
+                    for intersecting_geometry in SimulatorUtilities.polygon_parts(radar_intersections[pair_index]):
+                        result["radar_geometries"].append(intersecting_geometry)
+                        contacts.append((i, "radar", intersecting_geometry))
+                if msa_hits[pair_index]:
+                    result["collision_warning"] = True
+                    for intersecting_geometry in SimulatorUtilities.polygon_parts(msa_intersections[pair_index]):
+                        result["warning_geometries"].append(intersecting_geometry)
+                        contacts.append((i, "warning", intersecting_geometry))
+                    if hull_hits[pair_index]:
+                        result["collision_event"] = True
+                        result["collision_objects"].append(pair_coords[pair_index])
+            # Targets the hull passed through on its way here
+            for coords in swept_collisions[i]:
+                if not any(coords is collision_object for collision_object in result["collision_objects"]):
+                    result["collision_warning"] = True
+                    result["collision_event"] = True
+                    result["collision_objects"].append(coords)
+            results.append(result)
+        contact_coords, contact_distances, contact_summaries = SimulatorUtilities.contact_distances(
+            [geometry for _, _, geometry in contacts], positions[[i for i, _, _ in contacts]]
+        )
+        for (i, kind, _), coords, distances, summary in zip(contacts, contact_coords, contact_distances, contact_summaries):
+            results[i][f"{kind}_objects"].append(coords)
+            results[i][f"{kind}_object_distances"].append(distances)
+            results[i][f"{kind}_object_summaries"].append(summary)
+        for sensor, result in zip(sensors, results):
+            sensor.pending_sensing = result
+
+class ContactGrid:
+    """
+    A uniform grid of bounding boxes, used to find the ships near each other.
+
+    The World keeps one, which the sensing pass rebuilds every tick with the ships' hulls.
+
+    Attributes:
+    -----------
+    cell_size : float
+        The width and height of a cell, in meters.
+    cells : dict
+        The items (positions in the rebuilt list) in each occupied cell, keyed by cell (column, row).
+    """
+
+    def __init__(self, cell_size = 1000):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def cell_ranges(self, bounds):
+        min_x, min_y, max_x, max_y = (math.floor(b / self.cell_size) for b in bounds)
+        return range(min_x, max_x + 1), range(min_y, max_y + 1)
+
+    def rebuild(self, bounds):
+        """
+        Replace the contents of the grid.
+
+        Parameters:
+        -----------
+        bounds : numpy.ndarray
+            The (n, 4) bounding boxes (min x, min y, max x, max y) of the items.
+        """
+        self.cells = {}
+        for item, item_bounds in enumerate(bounds):
+            columns, rows = self.cell_ranges(item_bounds)
+            for column in columns:
+                for row in rows:
+                    self.cells.setdefault((column, row), []).append(item)
+
+    def query(self, bounds):
+        """
+        Find the items in the cells that a bounding box overlaps.
+
+        Parameters:
+        -----------
+        bounds : sequence of float
+            The bounding box (min x, min y, max x, max y) to search.
+
+        Returns:
+        --------
+        list of int
+            The items found, in order.
+        """
+        columns, rows = self.cell_ranges(bounds)
+        found = set()
+        if len(columns) * len(rows) > len(self.cells):
+            # The box covers more cells than are occupied
+            for (column, row), items in self.cells.items():
+                if column in columns and row in rows:
+                    found.update(items)
+        else:
+            for column in columns:
+                for row in rows:
+                    found.update(self.cells.get((column, row), ()))
+        return sorted(found)
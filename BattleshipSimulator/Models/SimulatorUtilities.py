@@ -1,7 +1,10 @@
+import functools
 import math
 import numpy as np
 import yaml
-from shapely.geometry import Polygon, MultiPolygon, LineString
+from shapely.geometry import Point, Polygon, MultiPolygon, LineString
+from shapely.geometry.base import BaseGeometry
+import shapely
 from shapely.affinity import translate, rotate, scale
 from BattleshipSimulator.python_vehicle_simulator.lib.gnc import attitudeEuler
 from BattleshipSimulator.python_vehicle_simulator.vehicles import frigate
@@ -108,6 +111,33 @@ def invert_heading(heading):
         # If the heading is 0, it is already at the neutral point
         return heading
 
+def wrap_to_reference(angle, reference, limit = 180):
+    """
+    Add or subtract whole turns from an angle until it is within `limit` degrees of a reference angle.
+
+    The heading autopilot tracks its setpoint as given (not modulo 360), so this picks the
+    setpoint that is reached by turning at most `limit` degrees from the reference.
+
+    Parameters:
+    -----------
+    angle : float
+        The angle to wrap, in degrees.
+    reference : float
+        The angle to wrap it towards, in degrees (e.g. the autopilot's unwrapped heading).
+    limit : float
+        The largest difference from the reference that is kept, in degrees (at least 180).
+
+    Returns:
+    --------
+    float
+        The angle plus a whole number of turns.
+    """
+    while angle - reference > limit:
+        angle -= 360
+    while reference - angle > limit:
+        angle += 360
+    return angle
+
 def R2D(value):  # radians to degrees
     return value * 180 / math.pi
 
@@ -367,16 +397,68 @@ def update_path_coordinates_with_angle(x, y, path, speed, timedelta):
     
     return new_x, new_y, facing_angle_degrees, updated_path
 
+def as_polygon(geometry):
+    """
+    Get a Shapely geometry for a polygon given as coordinates, or the geometry itself if it already is one.
+
+    Parameters:
+    -----------
+    geometry : list of tuple or shapely.Geometry
+        A list of (x, y) tuples defining the polygon, or an existing (possibly prepared) geometry.
+
+    Returns:
+    --------
+    shapely.Geometry
+        The geometry.
+    """
+    return geometry if isinstance(geometry, BaseGeometry) else Polygon(geometry)
+
+def intersection_parts(geometry1, geometry2):
+    """
+    Get the polygons that make up the intersection of two geometries.
+
+    Parameters:
+    -----------
+    geometry1 : shapely.Geometry
+        The first geometry.
+    geometry2 : shapely.Geometry
+        The second geometry.
+
+    Returns:
+    --------
+    list of Polygon
+        The polygonal parts of the intersection (empty if the geometries only touch or don't meet).
+    """
+    return polygon_parts(geometry1.intersection(geometry2))
+
+def polygon_parts(geometry):
+    """
+    Get the polygons that make up a geometry (e.g. the result of an intersection).
+
+    Parameters:
+    -----------
+    geometry : shapely.Geometry
+        A polygon, multi-polygon or geometry collection.
+
+    Returns:
+    --------
+    list of Polygon
+        The non-empty polygonal parts of the geometry.
+    """
+    if isinstance(geometry, Polygon):
+        return [] if geometry.is_empty else [geometry]
+    return [part for part in getattr(geometry, "geoms", []) if isinstance(part, Polygon) and not part.is_empty]
+
 def polygons_intersect(polygon1_coords, polygon2_coords):
     """
     Determine if one polygon touches or overlaps another polygon with optional transformations.
 
     Parameters:
     -----------
-    polygon1_coords : list of tuple
-        A list of (x, y) tuples defining the first polygon.
-    polygon2_coords : list of tuple
-        A list of (x, y) tuples defining the second polygon.
+    polygon1_coords : list of tuple or shapely.Geometry
+        A list of (x, y) tuples defining the first polygon, or the polygon itself.
+    polygon2_coords : list of tuple or shapely.Geometry
+        A list of (x, y) tuples defining the second polygon, or the polygon itself.
     offset1 : tuple, optional
         An (x, y) tuple defining the offset for the first polygon.
     offset2 : tuple, optional
@@ -392,20 +474,14 @@ def polygons_intersect(polygon1_coords, polygon2_coords):
         True if the polygons touch or overlap after transformations, otherwise False.
     """
 
-    # Convert coordinates to Shapely Polygons
-    polygon1 = Polygon(polygon1_coords)
-    polygon2 = Polygon(polygon2_coords)
+    # Convert coordinates to Shapely Polygons (geometries are used as they are)
+    polygon1 = as_polygon(polygon1_coords)
+    polygon2 = as_polygon(polygon2_coords)
     # Check if the polygons intersect (touch or overlap)
-    intersection = polygon1.intersection(polygon2)
-    is_overlap = not intersection.is_empty
+    is_overlap = polygon1.intersects(polygon2)
 
     # Convert to a list of Polygons (to handle MultiPolygon instances)
-    if isinstance(intersection, MultiPolygon):
-        intersection = list(intersection.geoms)
-    else:
-        intersection = [intersection]
-    
-    return is_overlap, [list(i.exterior.coords) for i in intersection] if is_overlap else None
+    return is_overlap, [list(i.exterior.coords) for i in intersection_parts(polygon1, polygon2)] if is_overlap else None
 
 def line_intersects_polygon(line_coords, polygon_coords):
     """
@@ -413,10 +489,10 @@ def line_intersects_polygon(line_coords, polygon_coords):
 
     Parameters:
     -----------
-    line_coords : list of tuple
-        A list of two (x, y) tuples defining the line.
-    polygon_coords : list of tuple
-        A list of (x, y) tuples defining the polygon.
+    line_coords : list of tuple or LineString
+        A list of two (x, y) tuples defining the line, or the line itself.
+    polygon_coords : list of tuple or shapely.Geometry
+        A list of (x, y) tuples defining the polygon, or the polygon itself.
 
     Returns:
     --------
@@ -424,9 +500,9 @@ def line_intersects_polygon(line_coords, polygon_coords):
         True if the line intersects (touches or crosses) the polygon, otherwise False.
     """
 
-    # Convert coordinates to Shapely LineString and Polygon
-    line = LineString(line_coords)
-    polygon = Polygon(polygon_coords)
+    # Convert coordinates to Shapely LineString and Polygon (geometries are used as they are)
+    line = line_coords if isinstance(line_coords, BaseGeometry) else LineString(line_coords)
+    polygon = as_polygon(polygon_coords)
 
     # Check if the line intersects the polygon
     is_intersect = line.intersects(polygon)
@@ -492,6 +568,240 @@ def transform_coordinates(coords, dx=0, dy=0, rotation_deg=0, scaling_factor=1.0
 
     return list(polygon.exterior.coords)
 
+def ring_vertices(coords):
+    """
+    Get the vertices of a polygon as a closed ring, for use with rigid_transform.
+
+    Parameters:
+    -----------
+    coords : list of tuple
+        A list of (x, y) tuples defining the polygon (the last point may or may not repeat the first).
+
+    Returns:
+    --------
+    numpy.ndarray
+        An (n, 2) array of the vertices, with the first vertex repeated at the end.
+    """
+    vertices = np.array(coords, dtype = float).reshape(-1, 2)
+    if len(vertices) > 0 and not np.array_equal(vertices[0], vertices[-1]):
+        vertices = np.vstack([vertices, vertices[:1]])
+    return vertices
+
+def rotation_terms(rotation_deg):
+    # The cosine and sine of a rotation, rounded the same way as shapely.affinity.rotate
+    angle = rotation_deg * math.pi / 180.0
+    cosp = math.cos(angle)
+    sinp = math.sin(angle)
+    if abs(cosp) < 2.5e-16:
+        cosp = 0.0
+    if abs(sinp) < 2.5e-16:
+        sinp = 0.0
+    return cosp, sinp
+
+def rigid_transform(vertices, dx=0, dy=0, rotation_deg=0):
+    """
+    Translate a ring of vertices and rotate it about the center of its bounding box.
+
+    This gives the same coordinates as transform_coordinates (with no scaling and the 'center'
+    origin), without building any Shapely geometry.
+
+    Parameters:
+    -----------
+    vertices : numpy.ndarray
+        An (n, 2) array of vertices, as returned by ring_vertices.
+    dx : float
+        Translation in x-direction.
+    dy : float
+        Translation in y-direction.
+    rotation_deg : float
+        Rotation angle in degrees (counterclockwise).
+
+    Returns:
+    --------
+    numpy.ndarray
+        The transformed (n, 2) vertices.
+    """
+    x = vertices[:, 0] + dx
+    y = vertices[:, 1] + dy
+    x0 = (x.max() + x.min()) / 2.0
+    y0 = (y.max() + y.min()) / 2.0
+    cosp, sinp = rotation_terms(rotation_deg)
+    xoff = x0 - x0 * cosp + y0 * sinp
+    yoff = y0 - x0 * sinp - y0 * cosp
+    return np.stack([cosp * x + -sinp * y + xoff, sinp * x + cosp * y + yoff], axis = 1)
+
+def rigid_transform_many(vertex_arrays, dx, dy, rotation_deg):
+    """
+    Apply rigid_transform to the vertices of many shapes at once.
+
+    Parameters:
+    -----------
+    vertex_arrays : list of numpy.ndarray
+        The (n_i, 2) vertex arrays of the shapes (they may have different lengths).
+    dx : sequence of float
+        Translation in x-direction of each shape.
+    dy : sequence of float
+        Translation in y-direction of each shape.
+    rotation_deg : sequence of float
+        Rotation angle in degrees of each shape.
+
+    Returns:
+    --------
+    list of numpy.ndarray
+        The transformed vertices of each shape.
+    """
+    if len(vertex_arrays) == 0:
+        return []
+    counts = np.array([len(vertices) for vertices in vertex_arrays])
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    vertices = np.concatenate(vertex_arrays)
+    x = vertices[:, 0] + np.repeat(np.asarray(dx, dtype = float), counts)
+    y = vertices[:, 1] + np.repeat(np.asarray(dy, dtype = float), counts)
+    x0 = (np.maximum.reduceat(x, starts) + np.minimum.reduceat(x, starts)) / 2.0
+    y0 = (np.maximum.reduceat(y, starts) + np.minimum.reduceat(y, starts)) / 2.0
+    cosp, sinp = np.array([rotation_terms(angle) for angle in rotation_deg]).reshape(-1, 2).T
+    xoff = x0 - x0 * cosp + y0 * sinp
+    yoff = y0 - x0 * sinp - y0 * cosp
+    cosp, sinp, xoff, yoff = (np.repeat(values, counts) for values in (cosp, sinp, xoff, yoff))
+    transformed = np.stack([cosp * x + -sinp * y + xoff, sinp * x + cosp * y + yoff], axis = 1)
+    return np.split(transformed, starts[1:])
+
+def vertex_list(vertices):
+    # The vertices as a list of (x, y) tuples, like Shapely's coordinate lists
+    return list(map(tuple, vertices.tolist()))
+
+# The most circle templates that are kept; the radar ranges of ensemble members are perturbed,
+# so a long-lived worker would otherwise keep a template for every member
+CIRCLE_TEMPLATE_CACHE_SIZE = 64
+
+@functools.lru_cache(maxsize = CIRCLE_TEMPLATE_CACHE_SIZE)
+def circle_template(radius, quad_segs):
+    # A circle centered on the origin (shared by every caller, so it is read-only)
+    template = np.array(Point(0, 0).buffer(radius, quad_segs = quad_segs).exterior.coords)
+    template.setflags(write = False)
+    return template
+
+def circle_vertices(x, y, radius, quad_segs=15):
+    """
+    Get the vertices of a circle, as Shapely would buffer the point (x, y) by the radius.
+
+    The circle is only buffered once per radius; after that it is translated from a template.
+
+    Parameters:
+    -----------
+    x : float
+        X-coordinate of the center.
+    y : float
+        Y-coordinate of the center.
+    radius : float
+        The radius of the circle.
+    quad_segs : int, optional
+        The number of segments per quarter circle. Default is 15.
+
+    Returns:
+    --------
+    numpy.ndarray
+        The (n, 2) vertices of the circle, as a closed ring.
+    """
+    return circle_template(radius, quad_segs) + (x, y)
+
+def swept_pieces(vertices, start_pose, end_pose, max_rotation=5):
+    """
+    Get polygons that together cover the area a ring of vertices sweeps between two poses.
+
+    The move is split into steps of at most `max_rotation` degrees of rotation. The area covered
+    in each step is the shape at both ends and, for every edge, the convex hull of the edge at
+    both ends; this is exact for a translation, and close for the small rotations of a step.
+
+    Parameters:
+    -----------
+    vertices : numpy.ndarray
+        An (n, 2) array of vertices, as returned by ring_vertices.
+    start_pose : tuple
+        The (x, y, rotation_deg) the shape moves from, as given to rigid_transform.
+    end_pose : tuple
+        The (x, y, rotation_deg) the shape moves to.
+    max_rotation : float, optional
+        The largest rotation (in degrees) of a step. Default is 5.
+
+    Returns:
+    --------
+    numpy.ndarray
+        The polygons (the shape at every step, and the area swept by each edge in each step).
+    """
+    x0, y0, rotation0 = start_pose
+    x1, y1, rotation1 = end_pose
+    # Turn the short way round
+    rotation = (rotation1 - rotation0 + 180) % 360 - 180
+    steps = max(1, math.ceil(abs(rotation) / max_rotation))
+    t = np.linspace(0, 1, steps + 1)
+    rings = np.stack(rigid_transform_many([vertices] * (steps + 1), x0 + t * (x1 - x0), y0 + t * (y1 - y0), rotation0 + t * rotation))
+    # The four corners of every edge at the start and the end of every step
+    corners = np.stack([rings[:-1, :-1], rings[:-1, 1:], rings[1:, 1:], rings[1:, :-1]], axis = 2).reshape(-1, 4, 2)
+    edge_areas = shapely.convex_hull(shapely.multipoints(corners))
+    return np.concatenate([shapely.polygons(rings), edge_areas])
+
+def contact_distances(geometries, points):
+    """
+    Get the exterior vertices of polygons and the distance of each vertex from a point.
+
+    Every polygon has its own point; the vertices of all of them are handled as one array.
+
+    Parameters:
+    -----------
+    geometries : list of Polygon
+        The polygons.
+    points : sequence of tuple
+        The (x, y) point to measure from, for each polygon.
+
+    Returns:
+    --------
+    tuple
+        For each polygon, its exterior coordinates (a list of (x, y) tuples), the distance of
+        each of them from the point (a list of floats), and a summary dict with the smallest
+        ("min_distance") and mean ("mean_distance") distance of its vertices and the closest
+        vertex ("closest_vertex"). The closing vertex of the ring isn't counted twice.
+    """
+    if len(geometries) == 0:
+        return [], [], []
+    coords, index = shapely.get_coordinates(shapely.get_exterior_ring(np.array(geometries, dtype = object)), return_index = True)
+    points = np.asarray(points, dtype = float).reshape(-1, 2)[index]
+    distances = np.sqrt((points[:, 0] - coords[:, 0]) ** 2 + (points[:, 1] - coords[:, 1]) ** 2)
+    counts = np.bincount(index, minlength = len(geometries))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    # The closing vertex repeats the first one, so it doesn't change the minimum
+    closest = np.lexsort((distances, index))[starts]
+    means = (np.add.reduceat(distances, starts) - distances[starts + counts - 1]) / (counts - 1)
+    summaries = [
+        {"min_distance": float(distances[c]), "mean_distance": float(mean), "closest_vertex": tuple(coords[c].tolist())}
+        for c, mean in zip(closest, means)
+    ]
+    coordinate_lists = [vertex_list(c) for c in np.split(coords, starts[1:])]
+    distance_lists = [d.tolist() for d in np.split(distances, starts[1:])]
+    return coordinate_lists, distance_lists, summaries
+
+def bounding_circles(geometries):
+    """
+    Get a bounding circle of each geometry, centered on the center of its bounding box.
+
+    Parameters:
+    -----------
+    geometries : numpy.ndarray
+        An array of Shapely geometries.
+
+    Returns:
+    --------
+    numpy.ndarray
+        An (n, 3) array of the center x, center y and radius of each circle.
+    """
+    bounds = shapely.bounds(geometries).reshape(-1, 4)
+    circles = np.zeros((len(bounds), 3))
+    circles[:, 0] = (bounds[:, 0] + bounds[:, 2]) / 2
+    circles[:, 1] = (bounds[:, 1] + bounds[:, 3]) / 2
+    coords, index = shapely.get_coordinates(geometries, return_index = True)
+    np.maximum.at(circles[:, 2], index, np.hypot(coords[:, 0] - circles[index, 0], coords[:, 1] - circles[index, 1]))
+    return circles
+
 def buffer_shape(geometry, distance):
     """
     Expand a convex polygon in all directions using the Minkowski sum concept.
@@ -502,8 +812,8 @@ def buffer_shape(geometry, distance):
 
     Parameters
     ----------
-    vertices : list of tuple
-        A list of (x, y) tuples defining the convex polygon.
+    vertices : list of tuple or shapely.Geometry
+        A list of (x, y) tuples defining the convex polygon, or the polygon itself.
     distance : float, optional
         The distance to expand the polygon in all directions. Default is 100.
 
@@ -513,8 +823,8 @@ def buffer_shape(geometry, distance):
         A list of (x, y) vertices of the expanded polygon. The last point is not repeated.
     """
     
-    # Create a shapely polygon from the vertices
-    polygon = Polygon(geometry)
+    # Create a shapely polygon from the vertices (geometries are used as they are)
+    polygon = as_polygon(geometry)
     # Use buffer to expand the polygon
     expanded_polygon = polygon.buffer(distance)
     return list(expanded_polygon.exterior.coords)
@@ -590,6 +900,28 @@ def load_yaml(infile):
     with open(infile, "r") as stream:
         return yaml.safe_load(stream)
 
+# Parsed YAML files, keyed by absolute path, with the modification time they were parsed at
+yaml_templates = {}
+
+def load_yaml_template(infile):
+    """
+    Load a YAML file, parsing it only the first time (or again if it has changed on disk).
+
+    The same parsed object is returned to every caller, so it must be treated as read-only;
+    copy anything that will be modified.
+
+    Args:
+    infile (str): The path of the YAML file.
+
+    Returns:
+    object: The parsed YAML data.
+    """
+    path = os.path.abspath(infile)
+    modified_time = os.path.getmtime(path)
+    if path not in yaml_templates or yaml_templates[path][0] != modified_time:
+        yaml_templates[path] = (modified_time, load_yaml(path))
+    return yaml_templates[path][1]
+
 def get_filename_without_extension(file_path):
     """
     Extracts the filename without the extension from a given file path.
@@ -0,0 +1,101 @@
+import math
+import numpy as np
+import shapely
+
+class AdaptiveStepController:
+    """
+    Chooses the time step of each simulation tick.
+
+    While a collision warning is raised, a ship is turning or being overridden, the simulation
+    advances at the base time step. When every moving ship is holding a straight leg with no
+    warning (its autopilot has settled on the chosen heading), the step grows to a multiple of
+    the base step, up to `max_timestep`. The vehicle dynamics are still integrated in stable
+    sub-steps (see `WorldState.max_substep`); a larger step only means the sensors, navigation,
+    conditions and logging run less often. The step is limited by:
+
+    - the radar: a ship may not close more than half of the gap between the nearest object in
+      radar range (or the edge of the radar range, if it is clear) and its minimum safe distance
+      in one step, so nothing can reach the minimum safe area between two sensor updates (with a
+      clearance field, the distance to land is looked up in it instead),
+    - the next waypoint: a ship may not move past the edge of the waypoint's acceptance circle.
+
+    Attributes:
+    -----------
+    simulator : Simulator
+        The simulation being stepped.
+    base_timestep : float
+        The regular time step (seconds); every step is a multiple of it.
+    max_timestep : float
+        The largest step that is ever taken (seconds).
+    """
+
+    # A leg is straight when the autopilot's reference heading and the ship's heading are both
+    # within this many degrees of the chosen heading...
+    STRAIGHT_HEADING_TOLERANCE = .5
+    # ... and the yaw rate is below this many degrees per second
+    STRAIGHT_YAW_RATE_TOLERANCE = .05
+
+    def __init__(self, simulator, base_timestep = .5, max_timestep = 10):
+        self.simulator = simulator
+        self.base_timestep = base_timestep
+        self.max_timestep = max(base_timestep, max_timestep)
+
+    def next_timestep(self):
+        """ Choose the time step of the next tick
+
+        Returns
+        -------
+        float
+            The time step, in seconds
+        """
+        # Nothing has been sensed before the first tick
+        if self.simulator.total_time == 0:
+            return self.base_timestep
+        world = self.simulator.world
+        state = world.state
+        limit = self.max_timestep
+        moving_models = []
+        for model in world.models.values():
+            radar_sonar = model.children.get("RadarSonar")
+            if radar_sonar is not None and radar_sonar.collision_warning:
+                return self.base_timestep
+            if model.current_speed > 0 and model.children["Navigation"].has_waypoints:
+                moving_models.append(model)
+        if len(moving_models) == 0:
+            return self.base_timestep
+        speeds = np.hypot(state.nu[:, 0], state.nu[:, 1])
+        # Other ships can close in from the other direction, so use the fastest ship for the closing speed
+        fastest_speed = float(np.max(speeds))
+        hulls = [(model, model.children["RadarSonar"].transformed_polygon) for model in world.models.values() if "RadarSonar" in model.children]
+        for model in moving_models:
+            if model.ca_override or model.user_override:
+                return self.base_timestep
+            # The autopilot tracks the chosen heading as given (not modulo 360)
+            reference_error = abs(model.chosen_heading - math.degrees(state.psi_d[model.state_index]))
+            heading_error = abs(model.chosen_heading - math.degrees(state.eta[model.state_index, 5]))
+            yaw_rate = math.degrees(abs(state.nu[model.state_index, 5]))
+            if max(reference_error, heading_error) > self.STRAIGHT_HEADING_TOLERANCE or yaw_rate > self.STRAIGHT_YAW_RATE_TOLERANCE:
+                return self.base_timestep
+            speed = float(speeds[model.state_index])
+            if speed <= 0:
+                continue
+            radar_sonar = model.children.get("RadarSonar")
+            if radar_sonar is not None:
+                clearance = radar_sonar.radar_range
+                if world.clearance_field is not None:
+                    # Look the distance to land up in the clearance field, and measure the other ships' hulls
+                    clearance = min(clearance, world.clearance_field.clearance(model.x, model.y) - world.clearance_field.error_bound)
+                    if len(hulls) > 1:
+                        clearance = min(clearance, float(np.min(shapely.distance(shapely.Point(model.x, model.y), [hull for other, hull in hulls if other is not model]))))
+                elif len(radar_sonar.radar_objects) > 0:
+                    # Outside of an object, the distance to it is the distance to its outline
+                    outlines = [shapely.LineString(coords) if len(coords) > 1 else shapely.Point(coords[0]) for coords in radar_sonar.radar_objects]
+                    clearance = min(clearance, float(np.min(shapely.distance(shapely.Point(model.x, model.y), outlines))))
+                closing_speed = speed + fastest_speed
+                limit = min(limit, (clearance - radar_sonar.minimum_safe_distance - model.length) / 2 / closing_speed)
+            navigation = model.children["Navigation"]
+            waypoint = navigation.waypoints[0]
+            waypoint_distance = math.hypot(waypoint[0] - model.x, waypoint[1] - model.y)
+            limit = min(limit, (waypoint_distance - navigation.ALLOWED_DISTANCE_ERROR) / speed)
+        # Keep the simulation time on the base step grid
+        return max(1, math.floor(limit / self.base_timestep)) * self.base_timestep
@@ -0,0 +1,248 @@
+import numpy as np
+
+class WorldState:
+    """
+    Struct-of-arrays store for the vehicle dynamics of every ship in a World.
+
+    Each ship owns one row of every array. The frigate heading autopilot and Norrbin/Nomoto
+    dynamics are advanced for all ships in a single vectorized call, mirroring
+    `frigate.headingAutopilot`, `frigate.dynamics` and `gnc.attitudeEuler` operation for operation.
+    Time steps longer than `max_substep` (the longest step for which the forward Euler integration
+    of the autopilot loop is stable) are split into equal sub-steps.
+
+    Attributes:
+    -----------
+    eta : numpy.ndarray
+        (N, 6) position/attitude vectors.
+    nu : numpy.ndarray
+        (N, 6) velocity vectors.
+    u_actual : numpy.ndarray
+        (N, 1) actual rudder angles.
+    e_int, psi_d, r_d, a_d : numpy.ndarray
+        (N,) heading autopilot integrator and reference model states.
+    max_substep : float
+        The longest stable integration step of all ships (seconds).
+    """
+
+    # Per-ship vehicle parameters copied from the frigate instance when a ship is added
+    VEHICLE_PARAMETERS = ["K", "T", "n1", "n3", "deltaMax", "DdeltaMax", "wn", "zeta", "wn_d", "zeta_d", "r_max"]
+    # Per-ship autopilot states
+    AUTOPILOT_STATES = ["e_int", "psi_d", "r_d", "a_d"]
+    # Everything that changes when the ships are stepped
+    DYNAMIC_STATES = ["eta", "nu", "u_actual"] + AUTOPILOT_STATES
+    # The resolution and upper end of the search for the longest stable integration step (seconds)
+    SUBSTEP_RESOLUTION = .05
+    SUBSTEP_SEARCH_LIMIT = 10
+    # The fraction of the stability boundary that is used as the longest sub-step, which keeps the
+    # integration well damped as well as stable
+    STABILITY_FACTOR = .5
+
+    def __init__(self):
+        self.size = 0
+        self.max_substep = np.inf
+        self.eta = np.empty([0, 6], float)
+        self.nu = np.empty([0, 6], float)
+        self.u_actual = np.empty([0, 1], float)
+        for name in self.VEHICLE_PARAMETERS + self.AUTOPILOT_STATES:
+            setattr(self, name, np.empty([0], float))
+
+    def add_ship(self, vehicle, eta, nu, u_actual):
+        """
+        Copy a ship's vehicle parameters and initial state into the store.
+
+        Parameters:
+        -----------
+        vehicle : frigate
+            The vehicle providing the model parameters and initial autopilot states.
+        eta, nu, u_actual : numpy.ndarray
+            The initial state vectors.
+
+        Returns:
+        --------
+        int
+            The row index of the ship.
+        """
+        self.eta = np.vstack([self.eta, np.asarray(eta, float)])
+        self.nu = np.vstack([self.nu, np.asarray(nu, float)])
+        self.u_actual = np.vstack([self.u_actual, np.asarray(u_actual, float)])
+        for name in self.VEHICLE_PARAMETERS + self.AUTOPILOT_STATES:
+            setattr(self, name, np.append(getattr(self, name), float(getattr(vehicle, name))))
+        self.size += 1
+        self.max_substep = min(self.max_substep, self.stable_timestep(self.size - 1))
+        return self.size - 1
+
+    def stable_timestep(self, index):
+        """
+        Find the longest step that the forward Euler integration of a ship should take.
+
+        The closed heading loop (rudder, Norrbin yaw dynamics, PID and reference model) is
+        linearized about a straight course, and the step is grown until the spectral radius of
+        the discrete transition matrix reaches 1. `STABILITY_FACTOR` of that boundary is returned.
+
+        Parameters:
+        -----------
+        index : int
+            The row index of the ship.
+
+        Returns:
+        --------
+        float
+            The step limit (seconds).
+        """
+        K, T, n1 = self.K[index], self.T[index], self.n1[index]
+        wn, zeta, wn_d, zeta_d = self.wn[index], self.zeta[index], self.wn_d[index], self.zeta_d[index]
+        m = T / K
+        Kp = m * wn ** 2
+        Kd = m * 2 * zeta * wn - n1 / K
+        Ki = (wn / 10) * Kp
+        c = 2 * zeta_d + 1
+        steps = 1
+        while steps * self.SUBSTEP_RESOLUTION < self.SUBSTEP_SEARCH_LIMIT:
+            dt = (steps + 1) * self.SUBSTEP_RESOLUTION
+            # States: psi, r, delta, e_int, psi_d, r_d, a_d (in the order they are updated by step)
+            r_row = np.array([0, 1 - dt * n1 / T, dt * K / T, 0, 0, 0, 0])
+            transition = np.array([
+                np.eye(7)[0] + dt * r_row,
+                r_row,
+                np.array([-Kp, -Kd, 1 / dt - 1, -Ki, Kp, Kd, 0]) * dt,
+                [dt, 0, 0, 1, -dt, 0, 0],
+                [0, 0, 0, 0, 1, dt, 0],
+                [0, 0, 0, 0, 0, 1, dt],
+                [0, 0, 0, 0, -dt * wn_d ** 3, -dt * c * wn_d ** 2, 1 - dt * c * wn_d]
+            ])
+            if np.max(np.abs(np.linalg.eigvals(transition))) >= 1:
+                break
+            steps += 1
+        return self.STABILITY_FACTOR * steps * self.SUBSTEP_RESOLUTION
+
+    def step(self, indices, headings, timedelta):
+        """
+        Advance the selected ships by one time step, in stable sub-steps if it is longer than `max_substep`.
+
+        Parameters:
+        -----------
+        indices : array_like
+            Row indices of the ships to advance.
+        headings : array_like
+            The autopilot heading setpoint (degrees) for each selected ship.
+        timedelta : float
+            The time step (seconds).
+
+        Returns:
+        --------
+        numpy.ndarray
+            (len(indices), 14) simulation data rows (eta, nu, u_control, u_actual), taken before
+            propagation, in the same layout as `SimulatorUtilities.getNextPosition`.
+        """
+        indices = np.asarray(indices, int)
+        psi_ref = np.asarray(headings, float) * np.pi / 180
+        substeps = 1 if timedelta <= self.max_substep else int(np.ceil(timedelta / self.max_substep))
+        sim_data = self.integrate(indices, psi_ref, timedelta / substeps)
+        for _ in range(substeps - 1):
+            self.integrate(indices, psi_ref, timedelta / substeps)
+        return sim_data
+
+    def integrate(self, indices, psi_ref, timedelta):
+        """
+        Advance the selected ships by a single forward Euler step.
+
+        Parameters:
+        -----------
+        indices : numpy.ndarray
+            Row indices of the ships to advance.
+        psi_ref : numpy.ndarray
+            The autopilot heading setpoint (radians) for each selected ship.
+        timedelta : float
+            The integration step (seconds).
+
+        Returns:
+        --------
+        numpy.ndarray
+            The simulation data rows taken before propagation (see `step`).
+        """
+        eta = self.eta[indices]
+        nu = self.nu[indices]
+        u_actual = self.u_actual[indices]
+        K, T, n1, n3 = self.K[indices], self.T[indices], self.n1[indices], self.n3[indices]
+
+        # Heading autopilot (PID pole placement with a 3rd-order reference model)
+        e_int, psi_d, r_d, a_d = self.e_int[indices], self.psi_d[indices], self.r_d[indices], self.a_d[indices]
+        wn, zeta, wn_d, zeta_d = self.wn[indices], self.zeta[indices], self.wn_d[indices], self.zeta_d[indices]
+        e_psi = eta[:, 5] - psi_d
+        e_r = nu[:, 5] - r_d
+        m = T / K
+        d = n1 / K
+        Kp = m * wn ** 2
+        Kd = m * 2 * zeta * wn - d
+        Ki = (wn / 10) * Kp
+        delta_c = -Kp * e_psi - Kd * e_r - Ki * e_int
+        e_int = e_int + timedelta * e_psi
+        j_d = wn_d ** 3 * (psi_ref - psi_d) - (2 * zeta_d + 1) * wn_d ** 2 * r_d - (2 * zeta_d + 1) * wn_d * a_d
+        psi_d = psi_d + timedelta * r_d
+        r_d = r_d + timedelta * a_d
+        a_d = a_d + timedelta * j_d
+        r_max = self.r_max[indices]
+        r_d = np.where(r_d > r_max, r_max, np.where(r_d < -r_max, -r_max, r_d))
+        self.e_int[indices], self.psi_d[indices], self.r_d[indices], self.a_d[indices] = e_int, psi_d, r_d, a_d
+
+        sim_data = np.hstack([eta, nu, delta_c[:, None], u_actual])
+
+        # Rudder saturation and Norrbin dynamics (forward Euler)
+        delta = u_actual[:, 0]
+        delta_max = self.deltaMax[indices] * np.pi / 180
+        delta = np.where(np.abs(delta) >= delta_max, np.sign(delta) * delta_max, delta)
+        delta_dot = delta_c - delta
+        delta_dot_max = self.DdeltaMax[indices] * np.pi / 180
+        delta_dot = np.where(np.abs(delta_dot) >= delta_dot_max, np.sign(delta_dot) * delta_dot_max, delta_dot)
+        r = nu[:, 5]
+        r_dot = (1 / T) * (K * delta - n3 * r ** 3 - n1 * r)
+        nu[:, 5] = nu[:, 5] + timedelta * r_dot
+        delta = delta + timedelta * delta_dot
+
+        # Attitude kinematics (forward Euler, zyx Euler angles)
+        phi, theta, psi = eta[:, 3], eta[:, 4], eta[:, 5]
+        cphi, sphi = np.cos(phi), np.sin(phi)
+        cth, sth = np.cos(theta), np.sin(theta)
+        cpsi, spsi = np.cos(psi), np.sin(psi)
+        u, v, w = nu[:, 0], nu[:, 1], nu[:, 2]
+        p, q, r = nu[:, 3], nu[:, 4], nu[:, 5]
+        x_dot = cpsi * cth * u + (-spsi * cphi + cpsi * sth * sphi) * v + (spsi * sphi + cpsi * cphi * sth) * w
+        y_dot = spsi * cth * u + (cpsi * cphi + sphi * sth * spsi) * v + (-cpsi * sphi + sth * spsi * cphi) * w
+        z_dot = -sth * u + cth * sphi * v + cth * cphi * w
+        phi_dot = p + sphi * sth / cth * q + cphi * sth / cth * r
+        theta_dot = cphi * q - sphi * r
+        psi_dot = sphi / cth * q + cphi / cth * r
+        eta[:, 0] += timedelta * x_dot
+        eta[:, 1] += timedelta * y_dot
+        eta[:, 2] += timedelta * z_dot
+        eta[:, 3] += timedelta * phi_dot
+        eta[:, 4] += timedelta * theta_dot
+        eta[:, 5] += timedelta * psi_dot
+
+        self.eta[indices] = eta
+        self.nu[indices] = nu
+        self.u_actual[indices, 0] = delta
+        return sim_data
+
+    def snapshot(self):
+        """
+        Copy the dynamic states of every ship.
+
+        Returns:
+        --------
+        dict
+            A copy of each array in `DYNAMIC_STATES`, keyed by name.
+        """
+        return {name: getattr(self, name).copy() for name in self.DYNAMIC_STATES}
+
+    def restore(self, snapshot):
+        """
+        Restore the dynamic states copied by `snapshot`, in place.
+
+        Parameters:
+        -----------
+        snapshot : dict
+            The arrays returned by `snapshot` for the same set of ships.
+        """
+        for name in self.DYNAMIC_STATES:
+            getattr(self, name)[...] = snapshot[name]
@@ -0,0 +1,192 @@
+from BattleshipSimulator.Models.GetterSetter import GetterSetter
+from BattleshipSimulator.Supervisor.Navigators import BaseRemoteNavigator, RemoteSupervisorBatch
+import argparse
+import http.server
+import json
+import requests
+import threading
+import time
+
+class LocalSupervisor:
+    """
+    A stand-in for a remote supervisor, served from this process, so that the remote navigators
+    can be run and benchmarked offline.
+
+    Every POST is answered with a JSON response after a fixed latency (the time that a real
+    supervisor would take to reach its decision). The server keeps connections alive and
+    answers requests in parallel, like a production supervisor behind a web server.
+
+    Attributes:
+    -----------
+    port : int
+        The port that the server listens on (0 picks a free port when the server starts).
+    latency : float
+        How long each request takes to answer, in seconds.
+    response : dict or callable
+        The JSON response to every request, or a function of the JSON request that returns it.
+    requests_served : int
+        How many requests have been answered.
+    """
+
+    def __init__(self, port = 0, latency = 0, response = None):
+        self.port = port
+        self.latency = latency
+        self.response = {} if response is None else response
+        self.requests_served = 0
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        supervisor = self
+
+        class RequestHandler(http.server.BaseHTTPRequestHandler):
+            # HTTP/1.1 keeps the connection open between requests
+            protocol_version = "HTTP/1.1"
+            # Send each response in one packet, so it isn't held back by delayed acknowledgements
+            wbufsize = -1
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or "null")
+                if supervisor.latency > 0:
+                    time.sleep(supervisor.latency)
+                response = supervisor.response(request) if callable(supervisor.response) else supervisor.response
+                body = json.dumps(response).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                supervisor.requests_served += 1
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", self.port), RequestHandler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target = self.server.serve_forever, daemon = True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+class BenchmarkModel(GetterSetter):
+    """ A bare model with the attributes that the remote navigators send by default """
+
+    def __init__(self):
+        super().__init__()
+        self.x = 0.
+        self.y = 0.
+        self.heading = 0.
+
+def benchmark(ticks = 200, latency = .01, tick_time = .01, timeout = .25, max_staleness = 1):
+    """
+    Measure how many ticks per second a remote navigator sustains against a local supervisor.
+
+    Each tick asks the navigator for its override and then spends `tick_time` seconds on the
+    rest of the simulation. Three clients are compared: a new connection per request (how the
+    navigator used to post), the pooled keep-alive session, and the asynchronous mode.
+
+    Parameters:
+    -----------
+    ticks : int
+        The number of ticks to run with each client.
+    latency : float
+        How long the supervisor takes to answer each request, in seconds.
+    tick_time : float
+        How long the rest of each tick takes, in seconds.
+    timeout : float
+        The timeout of the navigator's requests, in seconds.
+    max_staleness : int
+        The oldest response (in ticks) that the asynchronous navigator uses.
+
+    Returns:
+    --------
+    dict
+        The ticks per second, and the number of ticks without an override, of each client.
+    """
+    results = {}
+    with LocalSupervisor(latency = latency, response = {"heading": 0}) as supervisor:
+        for mode in ["unpooled", "pooled", "asynchronous"]:
+            model = BenchmarkModel()
+            navigator = BaseRemoteNavigator(model, supervisor.url, timeout, asynchronous = mode == "asynchronous", max_staleness = max_staleness)
+            if mode == "unpooled":
+                navigator.post = lambda data: requests.post(navigator.POST_url, timeout = navigator.timeout, json = data).json()
+            missed = 0
+            start_time = time.perf_counter()
+            for tick in range(ticks):
+                if len(navigator.override()) == 0:
+                    missed += 1
+                model.heading = (model.heading + 1) % 360
+                time.sleep(tick_time)
+            elapsed_time = time.perf_counter() - start_time
+            results[mode] = {"ticks_per_second": ticks / elapsed_time, "missed": missed}
+    return results
+
+def benchmark_batch(ships = 10, ticks = 100, latency = .01, timeout = .25):
+    """
+    Measure how many ticks per second a World of remote-supervised ships sustains, with a request
+    per ship and with one batched request for all of them.
+
+    Parameters:
+    -----------
+    ships : int
+        The number of ships.
+    ticks : int
+        The number of ticks to run each way.
+    latency : float
+        How long the supervisor takes to answer each request, in seconds.
+    timeout : float
+        The timeout of the requests, in seconds.
+
+    Returns:
+    --------
+    dict
+        The ticks per second of each way.
+    """
+    results = {}
+    response = lambda request: {"heading": [0] * len(request["ships"])} if "ships" in request else {"heading": 0}
+    with LocalSupervisor(latency = latency, response = response) as supervisor:
+        models = {f"Ship{i}": BenchmarkModel() for i in range(ships)}
+        per_ship = [BaseRemoteNavigator(model, supervisor.url, timeout) for model in models.values()]
+        batch = RemoteSupervisorBatch(supervisor.url, timeout)
+        for model_id, model in models.items():
+            batch.register(model_id, BaseRemoteNavigator(model, supervisor.url, timeout))
+        for mode in ["per ship", "batched"]:
+            start_time = time.perf_counter()
+            for tick in range(ticks):
+                if mode == "batched":
+                    batch.exchange()
+                else:
+                    for navigator in per_ship:
+                        navigator.override()
+            results[mode] = {"ticks_per_second": ticks / (time.perf_counter() - start_time)}
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark the remote navigator against a local stand-in supervisor")
+    parser.add_argument("--ticks", type = int, default = 200, help = "Number of ticks to run with each client. Default is 200.")
+    parser.add_argument("--latency", type = float, default = .01, help = "Seconds that the supervisor takes to answer. Default is 0.01.")
+    parser.add_argument("--tick-time", type = float, default = .01, help = "Seconds that the rest of each tick takes. Default is 0.01.")
+    parser.add_argument("--ships", type = int, default = 10, help = "Number of ships in the batched benchmark. Default is 10.")
+    parser.add_argument("--max-staleness", type = int, default = 1, help = "Oldest response (in ticks) used in asynchronous mode. Default is 1.")
+    args = parser.parse_args()
+    for mode, result in benchmark(args.ticks, args.latency, args.tick_time, max_staleness = args.max_staleness).items():
+        print(f"{mode:>12}: {result['ticks_per_second']:.1f} ticks/s, {result['missed']} ticks without an override")
+    for mode, result in benchmark_batch(args.ships, args.ticks, args.latency).items():
+        print(f"{args.ships} ships, {mode}: {result['ticks_per_second']:.1f} ticks/s")
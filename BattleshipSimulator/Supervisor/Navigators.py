@@ -1,44 +1,105 @@
+import atexit
+import concurrent.futures
 import requests
+import threading
 from BattleshipSimulator.Models.GetterSetter import GetterSetter
 import BattleshipSimulator.Models.SimulatorUtilities as SimulatorUtilities
+import numpy as np
 import shapely
 
 class BaseNavigator(GetterSetter):
 
     def __init__(self, model):
+        super().__init__()
         self.model = model
         self.supervisor_override = False
         self.logging_variables = []
+        self.snapshot_variables = ["supervisor_override"]
 
     def override(self):
         # Return true if any of the model's attributes were overridden
         return self.supervisor_override
+
+    def attach(self, world, model_id):
+        # Called once the model has been attached to the world
+        pass
+
+    def autopilot_heading(self, chosen_heading):
+        # The heading setpoint given to the autopilot, once every override has been applied
+        return chosen_heading
     
-    def logging_package(self):
-        logged_objects = {}
-        for k in self.logging_variables:
-            logged_value = getattr(self, k)
-            if type(logged_value) is list:
-                logged_value = [x for x in logged_value]
-            elif type(logged_value) is dict:
-                logged_value = {k:v for k,v in logged_value}
-            logged_objects[k] = logged_value
-            
-        return logged_objects
+    def logging_schema(self):
+        return [(k, self, k) for k in self.logging_variables]
 
 class BaseRemoteNavigator(BaseNavigator):
 
-    def __init__(self, model, url = "http://localhost", timeout = .25, attributes = ["x", "y", "heading"]):
+    # Keep-alive HTTP sessions, keyed by URL, shared by every navigator that posts to the URL from
+    # the same thread (a requests.Session isn't safe to use from several threads at once)
+    thread_sessions = threading.local()
+    # Every session of every thread, so that they can all be closed
+    all_sessions = []
+    sessions_lock = threading.Lock()
+    # The threads that send the requests of asynchronous navigators
+    executor = None
+
+    def __init__(self, model, url = "http://localhost", timeout = .25, attributes = ["x", "y", "heading"], asynchronous = False, max_staleness = 1):
         super().__init__(model)
         self.timeout = timeout
         self.logging_variables += ["is_error", "error_text"]
+        self.snapshot_variables += ["is_error", "error_text"]
         self.POST_url = url
         self.attributes = attributes
+        # Resolved on the first request, once the model's systems have been attached
+        self.attribute_handles = None
         self.is_error = False
         self.error_text = ""
+        # In asynchronous mode, the request for the next tick is sent while the simulation runs, and
+        # a response may be used up to max_staleness ticks after the state it was asked about
+        self.asynchronous = asynchronous
+        self.max_staleness = max_staleness
+        self.ticks = 0
+        self.pending_request = None
+        self.latest_response = None
+
+    @classmethod
+    def get_session(cls, url):
+        sessions = getattr(cls.thread_sessions, "sessions", None)
+        if sessions is None:
+            sessions = cls.thread_sessions.sessions = {}
+        if url not in sessions:
+            sessions[url] = requests.Session()
+            with cls.sessions_lock:
+                cls.all_sessions.append(sessions[url])
+        return sessions[url]
+
+    @classmethod
+    def get_executor(cls):
+        if cls.executor is None:
+            cls.executor = concurrent.futures.ThreadPoolExecutor(max_workers = 8, thread_name_prefix = "RemoteNavigator")
+        return cls.executor
+
+    @classmethod
+    def shutdown(cls):
+        """ Stop the request threads and close every session (they are created again when needed) """
+        if cls.executor is not None:
+            cls.executor.shutdown(wait = True, cancel_futures = True)
+            cls.executor = None
+        with cls.sessions_lock:
+            for session in cls.all_sessions:
+                session.close()
+            cls.all_sessions = []
+        cls.thread_sessions = threading.local()
     
     def override(self):
-        return self.send_post_request()
+        return self.receive_response() if self.asynchronous else self.send_post_request()
+
+    def request_data(self):
+        if self.attribute_handles is None:
+            self.attribute_handles = {k: self.model.resolve(k.replace(".",":")) for k in self.attributes}
+        return {k: handle.get() for k, handle in self.attribute_handles.items()}
+
+    def post(self, data):
+        return self.get_session(self.POST_url).post(self.POST_url, timeout = self.timeout, json = data).json()
     
     def send_post_request(self):
         """
@@ -51,12 +112,253 @@ class BaseRemoteNavigator(BaseNavigator):
         self.error_text = ""
 
         try:
-            return requests.post(self.POST_url, timeout = self.timeout, json = {k:self.model.get_attribute(k.replace(".",":")) for k in self.attributes}).json()
+            return self.post(self.request_data())
+        except Exception as err:
+            self.is_error = True
+            self.error_text = str(err)
+            return {}
+
+    def receive_response(self):
+        """
+        Use the latest response of the supervisor, and send the request for the next tick.
+
+        The request sent on one tick is answered while the rest of the tick runs, and its response
+        is used from the next tick on. If the latest response is more than max_staleness ticks old,
+        the request in flight is waited for (for up to the timeout); if it still doesn't arrive, the
+        supervisor doesn't override this tick.
+
+        Returns:
+        - dict: The parsed JSON data from the latest response, or an empty dict.
+        """
+        self.ticks += 1
+        self.is_error = False
+        self.error_text = ""
+
+        try:
+            self.collect_response(block = False)
+            if not self.is_fresh():
+                self.collect_response(block = True)
+        except Exception as err:
+            self.is_error = True
+            self.error_text = str(err)
+        if self.pending_request is None:
+            self.pending_request = (self.ticks, self.get_executor().submit(self.post, self.request_data()))
+        if not self.is_fresh():
+            if self.latest_response is not None and not self.is_error:
+                self.is_error = True
+                self.error_text = f"The latest response is {self.ticks - self.latest_response[0]} ticks old"
+            return {}
+        return self.latest_response[1]
+
+    def is_fresh(self):
+        return self.latest_response is not None and self.ticks - self.latest_response[0] <= self.max_staleness
+
+    def collect_response(self, block):
+        # Take the response of the request in flight, if it has arrived (or once it arrives, when blocking)
+        if self.pending_request is None:
+            return
+        sent_tick, future = self.pending_request
+        if not block and not future.done():
+            return
+        try:
+            response = future.result(timeout = self.timeout)
+        except concurrent.futures.TimeoutError:
+            # Still in flight; it can be used on a later tick
+            return
+        except Exception:
+            self.pending_request = None
+            raise
+        self.pending_request = None
+        self.latest_response = (sent_tick, response)
+
+# Don't leave the request threads and connections open when the process exits
+atexit.register(BaseRemoteNavigator.shutdown)
+
+class BatchedRemoteNavigator(BaseRemoteNavigator):
+    """
+    A remote navigator whose requests are batched with those of the other ships of the World
+    that use the same supervisor URL, so the supervisor gets one request per tick for all of them
+    (see RemoteSupervisorBatch). Until it is attached to a World, it sends its own requests like
+    a BaseRemoteNavigator.
+    """
+
+    def __init__(self, model, url = "http://localhost", timeout = .25, attributes = ["x", "y", "heading"]):
+        super().__init__(model, url, timeout, attributes)
+        self.model_id = None
+        self.batch = None
+
+    def attach(self, world, model_id):
+        self.model_id = model_id
+        self.batch = world.get_remote_batch(self.POST_url, self.timeout)
+        self.batch.register(model_id, self)
+
+    def override(self):
+        # A navigator that isn't attached to a World asks the supervisor on its own
+        if self.batch is None:
+            return super().override()
+        self.is_error = self.batch.is_error
+        self.error_text = self.batch.error_text
+        return self.batch.responses.get(self.model_id, {})
+
+class RemoteSupervisorBatch:
+    """
+    A remote supervisor of several ships, asked about all of them in one request per tick.
+
+    The request is columnar: "ships" lists the IDs of the ships, and every attribute that any of
+    them sends is a list with a value per ship (null for a ship that doesn't send it), e.g.
+
+        {"ships": ["PrimaryBattleship", "AircraftCarrier"], "x": [1200.5, 4100.0], "heading": [45.0, 270.0]}
+
+    The response has the same layout, with a list per override ("heading", "speed"); null means
+    no override for that ship. It may list the ships in another order by giving its own "ships".
+
+    Attributes:
+    -----------
+    url : str
+        The URL of the supervisor.
+    timeout : float
+        The timeout of each request, in seconds.
+    navigators : dict
+        The navigator of each ship, by model ID.
+    responses : dict
+        The overrides of each ship for this tick, by model ID.
+    """
+
+    def __init__(self, url, timeout = .25):
+        self.url = url
+        self.timeout = timeout
+        self.navigators = {}
+        self.responses = {}
+        self.is_error = False
+        self.error_text = ""
+
+    def register(self, model_id, navigator):
+        self.navigators[model_id] = navigator
+
+    def request_data(self):
+        values = [navigator.request_data() for navigator in self.navigators.values()]
+        data = {"ships": list(self.navigators)}
+        for ship_values in values:
+            for attribute in ship_values:
+                if attribute not in data:
+                    data[attribute] = [ship_values.get(attribute) for ship_values in values]
+        return data
+
+    def exchange(self):
+        """ Send the state of every ship to the supervisor, and sort its overrides by ship """
+        self.responses = {}
+        self.is_error = False
+        self.error_text = ""
+        if len(self.navigators) == 0:
+            return
+        try:
+            data = self.request_data()
+            response = BaseRemoteNavigator.get_session(self.url).post(self.url, timeout = self.timeout, json = data).json()
+            ships = response.get("ships", data["ships"])
+            for key, column in response.items():
+                if key == "ships":
+                    continue
+                for model_id, value in zip(ships, column):
+                    if value is not None:
+                        self.responses.setdefault(model_id, {})[key] = value
         except Exception as err:
             self.is_error = True
             self.error_text = str(err)
+            self.responses = {}
+
+class VisibilityGraphNavigator(BaseNavigator):
+    """
+    Plans a path around the World's obstacles to each of the ship's waypoints, and puts the
+    corners of the path in front of the waypoint in the ship's Navigation, so the ship steers
+    around the coastlines instead of straight at the waypoint. If the ship loses sight of its next
+    waypoint (e.g. it drifted off of the plan while turning), the path is planned again.
+
+    The paths are planned on the World's roadmaps (see VisibilityGraph) for the ship's clearance:
+    the radius of its hull, its minimum safe distance and a margin. Where no path keeps that
+    clearance (e.g. a channel is too narrow), half of the minimum safe distance, and then none
+    of it, is kept instead. The roadmaps are built on first use and shared with every ship that
+    has the same clearance. Other ships aren't planned around; they are left to the collision
+    avoidance.
+
+    Attributes:
+    -----------
+    margin : float
+        The extra clearance from the obstacles, in meters.
+    planned_goal : tuple or None
+        The waypoint that the current plan leads to.
+    intermediate_waypoints : list
+        The waypoints that were added for the current plan.
+    clearance_level : int
+        Which of the clearances the current plan keeps (0 is the full clearance).
+    """
+
+    # The share of the minimum safe distance that is kept, at each clearance level
+    SAFE_DISTANCE_SHARES = [1, .5, 0]
+
+    def __init__(self, model, margin = 0):
+        super().__init__(model)
+        self.margin = margin
+        self.world = None
+        self.roadmaps = None
+        self.planned_goal = None
+        self.intermediate_waypoints = []
+        self.clearance_level = 0
+        self.snapshot_variables = ["supervisor_override", "planned_goal", "intermediate_waypoints", "clearance_level"]
+
+    def attach(self, world, model_id):
+        self.world = world
+
+    def autopilot_heading(self, chosen_heading):
+        # The autopilot tracks its setpoint as given (not modulo 360), so once the ship has turned
+        # past it, a change of direction could ask for nearly a full circle, which carries the ship
+        # off of its planned leg; keep the setpoint within half a turn (plus the 10 degrees of
+        # hysteresis of the port/starboard choice) of the autopilot's heading
+        return SimulatorUtilities.wrap_to_reference(chosen_heading, np.degrees(self.model.oldEta[5]), 190)
+
+    def get_roadmap(self, clearance_level):
+        if self.roadmaps is None:
+            self.roadmaps = [None] * len(self.SAFE_DISTANCE_SHARES)
+        if self.roadmaps[clearance_level] is None:
+            hull_radius = max(np.hypot(x, y) for x, y in self.model.geometry)
+            minimum_safe_distance = self.model.children["RadarSonar"].minimum_safe_distance if "RadarSonar" in self.model.children else 0
+            clearance = hull_radius + self.SAFE_DISTANCE_SHARES[clearance_level] * minimum_safe_distance + self.margin
+            self.roadmaps[clearance_level] = self.world.get_roadmap(clearance, self.model.guardrails)
+        return self.roadmaps[clearance_level]
+
+    def override(self):
+        navigation = self.model.children["Navigation"]
+        if len(navigation.waypoints) == 0:
             return {}
+        position = (self.model.x, self.model.y)
+        next_waypoint = tuple(navigation.waypoints[0])
+        if next_waypoint != self.planned_goal and next_waypoint not in self.intermediate_waypoints:
+            self.plan(navigation, position, next_waypoint)
+        elif not self.get_roadmap(self.clearance_level).is_visible(position, next_waypoint):
+            # The ship has drifted off of the plan (e.g. while turning onto a leg), so plan again from here
+            while len(navigation.waypoints) > 0 and tuple(navigation.waypoints[0]) in self.intermediate_waypoints:
+                navigation.waypoints.pop(0)
+            self.plan(navigation, position, self.planned_goal)
+        # The corners don't have to be reached: once the waypoint after a corner is in sight, head
+        # straight for it (a corner within the ship's turning circle could otherwise be circled forever)
+        roadmap = self.get_roadmap(self.clearance_level)
+        while len(navigation.waypoints) > 1 and tuple(navigation.waypoints[0]) in self.intermediate_waypoints and roadmap.is_visible(position, navigation.waypoints[1]):
+            navigation.waypoints.pop(0)
+            navigation.next_waypoint = navigation.waypoints[0]
+        return {}
 
+    def plan(self, navigation, position, goal):
+        self.planned_goal = goal
+        self.intermediate_waypoints = []
+        for clearance_level in range(len(self.SAFE_DISTANCE_SHARES)):
+            path = self.get_roadmap(clearance_level).shortest_path(position, goal)
+            if path is not None:
+                self.clearance_level = clearance_level
+                self.intermediate_waypoints = path[1:-1]
+                break
+        # If there is no clear path at all, steer straight at the waypoint and leave it to the collision avoidance
+        if len(self.intermediate_waypoints) > 0:
+            navigation.waypoints[0:0] = self.intermediate_waypoints
+            navigation.next_waypoint = navigation.waypoints[0]
 
 ######################################################################
 #   Get the bounding box of a set of coordinates.                    #
@@ -86,7 +388,7 @@ class CollisionAvoidanceNavigator(BaseNavigator):
             boundary_dist = self.model.get_attribute("RadarSonar:radar_range")
             # buffer heading is the static variable used to determine the response to objects being detected
             buffer_heading = 50
-            warning_objects = self.model.get_attribute("RadarSonar:warning_objects")
+            warning_objects = self.model.get_attribute("RadarSonar:warning_geometries")
             heading = self.model.heading
             x0 = self.model.x
             y0 = self.model.y
@@ -98,17 +400,17 @@ class CollisionAvoidanceNavigator(BaseNavigator):
             # coordinates for the radar range side of the rectangles
             (min_x1, min_y1, max_x1, max_y1) = SimulatorUtilities.calculate_line_coordinates_from_center(x1,y1, width, heading+90)
 
-            #shapely rectangles
-            poly1 = shapely.Polygon([(min_x0, min_y0), (min_x1, min_y1), (x1, y1), (x0, y0), (min_x0, min_y0)])
-            poly2 = shapely.Polygon([(max_x0, max_y0), (max_x1, max_y1), (x1, y1), (x0, y0), (max_x0, max_y0)])
-            collision = False
-            sign = -1
-            for object in warning_objects:
-                # check for intersection of the polygons and warning objects
-                if (shapely.intersects(shapely.Polygon(object), poly1) or shapely.intersects(shapely.Polygon(object), poly2)):
-                    collision = True
-                    if (shapely.intersects(shapely.Polygon(object), poly1)):
-                        sign = 1
+            #shapely rectangles, prepared as they are tested against every warning object
+            sectors = shapely.polygons([
+                [(min_x0, min_y0), (min_x1, min_y1), (x1, y1), (x0, y0), (min_x0, min_y0)],
+                [(max_x0, max_y0), (max_x1, max_y1), (x1, y1), (x0, y0), (max_x0, max_y0)]
+            ])
+            shapely.prepare(sectors)
+            # check for intersection of the polygons and warning objects, as a (sector, warning object) matrix
+            # (a prepared geometry is only used as the first argument)
+            hits = shapely.intersects(sectors[:, None], np.array(warning_objects, dtype = object)[None, :])
+            collision = bool(hits.any())
+            sign = 1 if hits[0].any() else -1
             return {"heading": heading + sign * buffer_heading} if collision else {}
         else:
             return {}
@@ -118,6 +420,7 @@ class PointAvoidanceNavigator(BaseNavigator):
     def __init__(self, model):
         super().__init__(model)
         self.logging_variables = ["relevant_objects"]
+        self.snapshot_variables += ["relevant_objects", "last_override_value"]
         self.relevant_objects = []
         self.last_override_value = None
 
@@ -136,33 +439,35 @@ class PointAvoidanceNavigator(BaseNavigator):
                 line_distance,
                 model_h
             )
-            headling_line_coords = ((heading_line[0], heading_line[1]), (heading_line[2], heading_line[3]))
+            headling_line_coords = shapely.LineString(((heading_line[0], heading_line[1]), (heading_line[2], heading_line[3])))
             chosen_heading_line = SimulatorUtilities.calculate_line_coordinates_from_end(
                 model_x,
                 model_y,
                 line_distance,
                 model_chosen_h
             )
-            chosen_heading_line_coords = ((chosen_heading_line[0], chosen_heading_line[1]), (chosen_heading_line[2], chosen_heading_line[3]))
+            chosen_heading_line_coords = shapely.LineString(((chosen_heading_line[0], chosen_heading_line[1]), (chosen_heading_line[2], chosen_heading_line[3])))
 
             heading_override = False
             waypoint_heading_override = False
             self.relevant_objects = []
-            for obstacle in self.model.get_attribute("RadarSonar:radar_objects"):
+            # Obstacles seen before (by any ship) are only enlarged once
+            configuration_space = self.resolve("World:configuration_space").get()
+            for obstacle in self.model.get_attribute("RadarSonar:radar_geometries"):
                 # Artificially increase the size of the object by 2x the ship's width
-                enlarged_obstacle = SimulatorUtilities.buffer_shape(obstacle, safe_threshhold)
-                obstacle_added = False
-                if SimulatorUtilities.line_intersects_polygon(headling_line_coords, enlarged_obstacle):
+                enlarged_geometry, enlarged_coords = configuration_space.inflate(obstacle, safe_threshhold)
+                enlarged_obstacle = None
+                if SimulatorUtilities.line_intersects_polygon(headling_line_coords, enlarged_geometry):
                     heading_override = True
                     # Save a reference to the enlarged obstacle, the distance to all of its points, and the angle in relation to the current heading
+                    enlarged_obstacle = enlarged_coords
                     self.relevant_objects.append(enlarged_obstacle)
-                    obstacle_added = True
                     # TODO: if x,y is already inside the polygon, skim along the edge
-                if SimulatorUtilities.line_intersects_polygon(chosen_heading_line_coords, enlarged_obstacle):
+                if SimulatorUtilities.line_intersects_polygon(chosen_heading_line_coords, enlarged_geometry):
                     waypoint_heading_override = True
                     # Save a reference to the enlarged obstacle, the distance to all of its points, and the angle in relation to the current heading
-                    if not obstacle_added:
-                        self.relevant_objects.append(enlarged_obstacle)
+                    if enlarged_obstacle is None:
+                        self.relevant_objects.append(enlarged_coords)
                     # TODO: if x,y is already inside the polygon, skim along the edge
             
             # Plot the minimum course to avoid the obstacles, starting from the current heading. Prefer to keep going in the same direction that it's already turning
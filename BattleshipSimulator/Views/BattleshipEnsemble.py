@@ -0,0 +1,253 @@
+import BattleshipSimulator.BattleshipController as BattleCtrl
+import BattleshipSimulator.Models.Environment as Environment
+import BattleshipSimulator.Models.SimulatorUtilities as SimulatorUtilities
+from BattleshipSimulator.Models.TimeStepping import AdaptiveStepController
+import BattleshipSimulator.Views.BattleshipSweep as BattleSweep
+import concurrent.futures
+import copy
+import math
+import multiprocessing
+import numpy as np
+import time
+
+# The standard deviation of each perturbation applied to an ensemble member
+DEFAULT_SPREAD = {
+    "position": 50,                 # start x and y, in meters
+    "heading": 5,                   # start heading, in degrees
+    "speed": .5,                    # start speed
+    "minimum_safe_distance": 25,    # RadarSonar minimum safe distance, in meters
+    "radar_range": 100,             # RadarSonar range, in meters
+    "waypoint": 25                  # waypoint x and y, in meters
+}
+
+def member_rng(seed, member):
+    """ Create the random generator of an ensemble member
+
+    The generator only depends on the seed and the member number, so a member draws the same
+    perturbations whichever worker runs it.
+    """
+    return np.random.default_rng([seed, member])
+
+def perturb_scenario(config_data, rng, spread = DEFAULT_SPREAD):
+    """ Create a perturbed copy of a scenario
+
+    Every entity gets a perturbed start position, heading and speed, RadarSonar minimum safe
+    distance and range, and jittered waypoints. Values that the entity doesn't set itself are
+    taken from its entity configuration.
+
+    Parameters
+    ----------
+    config_data : dict
+        The scenario, as loaded from its YAML file (it isn't modified)
+    rng : numpy.random.Generator
+        The source of the perturbations
+    spread : dict, optional
+        The standard deviation of each perturbation (see DEFAULT_SPREAD); missing keys aren't perturbed
+
+    Returns
+    -------
+    dict
+        The perturbed scenario
+    """
+    config_data = copy.deepcopy(config_data)
+    for entity in config_data.get("entities", []):
+        entity_config = SimulatorUtilities.load_yaml_template(entity["_configuration"])
+        def base_value(key, system = None, default = 0):
+            if system is None:
+                return entity.get(key, entity_config.get(key, default))
+            return entity.get(system, {}).get(key, entity_config.get(system, {}).get(key, default))
+        if "position" in spread:
+            entity["x"] = float(base_value("x") + rng.normal(0, spread["position"]))
+            entity["y"] = float(base_value("y") + rng.normal(0, spread["position"]))
+        if "heading" in spread:
+            entity["heading"] = float(base_value("heading") + rng.normal(0, spread["heading"]))
+        if "speed" in spread:
+            entity["speed"] = max(0., float(base_value("speed") + rng.normal(0, spread["speed"])))
+        radar_sonar = entity.setdefault("_RadarSonar", {})
+        if "minimum_safe_distance" in spread:
+            radar_sonar["minimum_safe_distance"] = max(1., float(base_value("minimum_safe_distance", "_RadarSonar", 100) + rng.normal(0, spread["minimum_safe_distance"])))
+        if "radar_range" in spread:
+            radar_sonar["radar_range"] = max(1., float(base_value("radar_range", "_RadarSonar", 1000) + rng.normal(0, spread["radar_range"])))
+        if "waypoint" in spread:
+            waypoints = base_value("waypoints", "_Navigation", [])
+            if len(waypoints) > 0:
+                entity.setdefault("_Navigation", {})["waypoints"] = [
+                    [float(x + rng.normal(0, spread["waypoint"])), float(y + rng.normal(0, spread["waypoint"]))] for x, y in waypoints
+                ]
+    return config_data
+
+def run_member(scenario_cfg, member, seed, spread = DEFAULT_SPREAD, timedelta = .5, zmq_port = None, adaptive = False):
+    """ Run one ensemble member headless until it terminates
+
+    Parameters
+    ----------
+    scenario_cfg : str
+        The path to the scenario YAML
+    member : int
+        The member number, which selects its perturbations
+    seed : int
+        The seed of the ensemble
+    spread : dict, optional
+        The standard deviation of each perturbation
+    timedelta : float, optional
+        The fixed simulation time step, in seconds
+    zmq_port : int or None, optional
+        The telemetry port; when running inside a worker, the worker's port is used instead
+    adaptive : bool, optional
+        Take larger steps (multiples of timedelta) while the sea is clear
+
+    Returns
+    -------
+    dict
+        The outcome, collision statistics and timing of the run
+    """
+    zmq_port = BattleSweep._worker_zmq_port if zmq_port is None else zmq_port
+    result = {
+        "member": member,
+        "status": "Error",
+        "ticks": 0,
+        "sim_time": 0,
+        "wall_time": 0,
+        "collision": False,
+        "first_collision_time": None,
+        "warning_time": 0,
+        "out_of_bounds": False,
+        "error": ""
+    }
+    start_time = time.perf_counter()
+    simulator = None
+    try:
+        config_data = perturb_scenario(SimulatorUtilities.load_yaml_template(scenario_cfg), member_rng(seed, member), spread)
+        simulator = Environment.Simulator(scenario_cfg, zmq_port = zmq_port, config_data = config_data)
+        controller = BattleCtrl.BattleshipController(simulator)
+        models = list(simulator.world.models.values())
+        radars = [model.children["RadarSonar"] for model in models if "RadarSonar" in model.children]
+        step_controller = AdaptiveStepController(simulator, timedelta) if adaptive else None
+        simulator.start()
+        while simulator.simulation_running:
+            step = timedelta if step_controller is None else step_controller.next_timestep()
+            controller.update(step)
+            result["ticks"] += 1
+            if any(radar.collision_warning for radar in radars):
+                result["warning_time"] += step
+            if not result["collision"] and any(radar.collision_event for radar in radars):
+                result["collision"] = True
+                result["first_collision_time"] = simulator.total_time
+            result["out_of_bounds"] = result["out_of_bounds"] or any(model.out_of_bounds for model in models)
+        result["status"] = simulator.simulation_status
+        result["sim_time"] = simulator.total_time
+    except Exception as err:
+        result["error"] = f"{err.__class__.__name__}: {err}"
+    finally:
+        if simulator is not None:
+            simulator.close_log("Error")
+    result["wall_time"] = time.perf_counter() - start_time
+    return result
+
+class BattleshipViewEnsemble():
+    """
+    Headless view that runs a Monte Carlo ensemble of one scenario over perturbed initial conditions.
+
+    Attributes:
+    -----------
+    scenario : str
+        The scenario YAML file.
+    members : int
+        The number of ensemble members.
+    seed : int
+        The seed of the ensemble; the same seed reproduces the same members.
+    workers : int
+        The number of worker processes; 1 runs every member in this process.
+    zmq_port : int or None
+        The first telemetry port (see BattleshipViewSweep); None disables telemetry.
+    spread : dict
+        The standard deviation of each perturbation.
+    adaptive : bool
+        Take larger steps while the sea is clear (see AdaptiveStepController).
+    """
+
+    def __init__(self, scenario, members, seed = 0, workers = 1, zmq_port = None, spread = DEFAULT_SPREAD, timedelta = .5, adaptive = False):
+        self.scenario = scenario
+        self.members = members
+        self.seed = seed
+        self.workers = max(1, workers)
+        self.zmq_port = zmq_port
+        self.spread = spread
+        self.timedelta = timedelta
+        self.adaptive = adaptive
+        self.results = []
+        self.elapsed_time = 0
+
+    def start(self):
+        print(f"Running {self.members} ensemble members of {self.scenario} (seed {self.seed}) with {self.workers} worker{'s' if self.workers != 1 else ''}")
+        start_time = time.perf_counter()
+        if self.workers == 1:
+            for member in range(self.members):
+                self.results.append(run_member(self.scenario, member, self.seed, self.spread, self.timedelta, self.zmq_port, self.adaptive))
+            BattleSweep._shutdown_worker()
+        else:
+            worker_counter = multiprocessing.Value("i", 0)
+            with concurrent.futures.ProcessPoolExecutor(max_workers = self.workers, initializer = BattleSweep._init_worker, initargs = (self.zmq_port, worker_counter)) as executor:
+                futures = [executor.submit(run_member, self.scenario, member, self.seed, self.spread, self.timedelta, None, self.adaptive) for member in range(self.members)]
+                for future in concurrent.futures.as_completed(futures):
+                    self.results.append(future.result())
+        self.elapsed_time = time.perf_counter() - start_time
+        self.results.sort(key = lambda result: result["member"])
+        self.print_summary()
+        return self.statistics()
+
+    def statistics(self):
+        """ Aggregate the outcomes of the ensemble
+
+        Returns
+        -------
+        dict
+            The outcome counts, the success probability with a 95% (Wilson) confidence interval,
+            and the collision statistics
+        """
+        n = len(self.results)
+        counts = {outcome: 0 for outcome in BattleSweep.BattleshipViewSweep.OUTCOMES}
+        for result in self.results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        successes = counts["Success"]
+        collisions = [result for result in self.results if result["collision"]]
+        statistics = {
+            "members": n,
+            "outcomes": counts,
+            "success_probability": successes / n if n > 0 else 0,
+            "success_interval": self.wilson_interval(successes, n),
+            "collision_probability": len(collisions) / n if n > 0 else 0,
+            "collision_interval": self.wilson_interval(len(collisions), n),
+            "mean_first_collision_time": float(np.mean([result["first_collision_time"] for result in collisions])) if len(collisions) > 0 else None,
+            "mean_warning_time": float(np.mean([result["warning_time"] for result in self.results])) if n > 0 else 0,
+            "out_of_bounds_probability": sum(result["out_of_bounds"] for result in self.results) / n if n > 0 else 0,
+            "ticks": sum(result["ticks"] for result in self.results)
+        }
+        return statistics
+
+    @staticmethod
+    def wilson_interval(successes, n, z = 1.96):
+        if n == 0:
+            return (0., 1.)
+        p = successes / n
+        center = (p + z ** 2 / (2 * n)) / (1 + z ** 2 / n)
+        half_width = z * math.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / (1 + z ** 2 / n)
+        return (max(0., center - half_width), min(1., center + half_width))
+
+    def print_summary(self):
+        statistics = self.statistics()
+        print()
+        print("  ".join(f"{outcome}: {count}" for outcome, count in statistics["outcomes"].items()))
+        low, high = statistics["success_interval"]
+        print(f"Success probability:   {statistics['success_probability']:.3f} (95% CI {low:.3f} - {high:.3f})")
+        low, high = statistics["collision_interval"]
+        print(f"Collision probability: {statistics['collision_probability']:.3f} (95% CI {low:.3f} - {high:.3f})")
+        if statistics["mean_first_collision_time"] is not None:
+            print(f"Mean time to first collision: {statistics['mean_first_collision_time']:.1f} s")
+        print(f"Mean time with a collision warning: {statistics['mean_warning_time']:.1f} s")
+        print(f"Out of bounds probability: {statistics['out_of_bounds_probability']:.3f}")
+        for result in self.results:
+            if result["error"]:
+                print(f"  member {result['member']}: {result['error']}")
+        print(f"Total: {statistics['members']} members, {statistics['ticks']} ticks in {self.elapsed_time:.2f} s "
+              f"({statistics['ticks'] / self.elapsed_time if self.elapsed_time > 0 else 0:.0f} ticks/s overall)")
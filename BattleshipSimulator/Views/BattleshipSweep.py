@@ -0,0 +1,162 @@
+import BattleshipSimulator.BattleshipController as BattleCtrl
+import BattleshipSimulator.Models.Environment as Environment
+from BattleshipSimulator.Models.Logger import CSVLogger
+import BattleshipSimulator.Models.SimulatorUtilities as SimulatorUtilities
+from BattleshipSimulator.Models.TimeStepping import AdaptiveStepController
+from BattleshipSimulator.Supervisor.Navigators import BaseRemoteNavigator
+import concurrent.futures
+import multiprocessing
+import multiprocessing.util
+import time
+
+# The telemetry port assigned to the current worker process (None disables telemetry)
+_worker_zmq_port = None
+
+def _shutdown_worker():
+    """ Release the telemetry ports and remote supervisor connections of this process """
+    CSVLogger.close_publishers()
+    BaseRemoteNavigator.shutdown()
+
+def _init_worker(base_port, worker_counter):
+    """ Give each worker process its own telemetry port, and release it when the worker exits
+
+    Parameters
+    ----------
+    base_port : int or None
+        The first port in the range; None disables telemetry for every worker
+    worker_counter : multiprocessing.Value
+        A shared counter used to hand out a unique slot to each worker
+    """
+    global _worker_zmq_port
+    # Worker processes don't run atexit handlers, but they do run multiprocessing finalizers
+    multiprocessing.util.Finalize(None, _shutdown_worker, exitpriority = 10)
+    if base_port is None:
+        _worker_zmq_port = None
+        return
+    with worker_counter.get_lock():
+        slot = worker_counter.value
+        worker_counter.value += 1
+    _worker_zmq_port = base_port + slot
+
+def run_scenario(scenario_cfg, timedelta = .5, zmq_port = None, adaptive = False):
+    """ Run a single scenario headless until it terminates
+
+    Parameters
+    ----------
+    scenario_cfg : str
+        The path to the scenario YAML
+    timedelta : float, optional
+        The fixed simulation time step, in seconds
+    zmq_port : int or None, optional
+        The telemetry port; when running inside a sweep worker, the worker's port is used instead
+    adaptive : bool, optional
+        Take larger steps (multiples of timedelta) while the sea is clear
+
+    Returns
+    -------
+    dict
+        The outcome and timing statistics of the run
+    """
+    zmq_port = _worker_zmq_port if zmq_port is None else zmq_port
+    result = {
+        "scenario": scenario_cfg,
+        "status": "Error",
+        "ticks": 0,
+        "sim_time": 0,
+        "wall_time": 0,
+        "tick_rate": 0,
+        "error": ""
+    }
+    start_time = time.perf_counter()
+    simulator = None
+    try:
+        simulator = Environment.Simulator(scenario_cfg, zmq_port = zmq_port)
+        controller = BattleCtrl.BattleshipController(simulator)
+        step_controller = AdaptiveStepController(simulator, timedelta) if adaptive else None
+        simulator.start()
+        while simulator.simulation_running:
+            controller.update(timedelta if step_controller is None else step_controller.next_timestep())
+            result["ticks"] += 1
+        result["status"] = simulator.simulation_status
+        result["sim_time"] = simulator.total_time
+    except Exception as err:
+        result["error"] = f"{err.__class__.__name__}: {err}"
+    finally:
+        # A run that raised leaves its results file open; close it, named as an error
+        if simulator is not None:
+            simulator.close_log("Error")
+    result["wall_time"] = time.perf_counter() - start_time
+    if result["wall_time"] > 0:
+        result["tick_rate"] = result["ticks"] / result["wall_time"]
+    return result
+
+class BattleshipViewSweep():
+    """
+    Headless view that runs a batch of scenarios, optionally across a pool of worker processes.
+
+    Attributes:
+    -----------
+    scenarios : list
+        The scenario YAML files to run.
+    workers : int
+        The number of worker processes; 1 runs every scenario in this process.
+    zmq_port : int or None
+        The first telemetry port. Each worker publishes on its own port (zmq_port + worker slot);
+        None disables telemetry entirely.
+    adaptive : bool
+        Take larger steps while the sea is clear (see AdaptiveStepController).
+    """
+
+    OUTCOMES = ["Success", "Fail-Condition", "Fail-Timeout", "Error"]
+
+    def __init__(self, scenarios, workers = 1, zmq_port = 5556, timedelta = .5, adaptive = False):
+        self.scenarios = list(scenarios)
+        self.workers = max(1, workers)
+        self.zmq_port = zmq_port
+        self.timedelta = timedelta
+        self.adaptive = adaptive
+        self.results = []
+        self.elapsed_time = 0
+
+    def start(self):
+        print(f"Running {len(self.scenarios)} scenarios with {self.workers} worker{'s' if self.workers != 1 else ''}")
+        start_time = time.perf_counter()
+        if self.workers == 1:
+            for scenario_cfg in self.scenarios:
+                self.report(run_scenario(scenario_cfg, self.timedelta, self.zmq_port, self.adaptive))
+            _shutdown_worker()
+        else:
+            worker_counter = multiprocessing.Value("i", 0)
+            with concurrent.futures.ProcessPoolExecutor(max_workers = self.workers, initializer = _init_worker, initargs = (self.zmq_port, worker_counter)) as executor:
+                futures = [executor.submit(run_scenario, scenario_cfg, self.timedelta, None, self.adaptive) for scenario_cfg in self.scenarios]
+                for future in concurrent.futures.as_completed(futures):
+                    self.report(future.result())
+        self.elapsed_time = time.perf_counter() - start_time
+        # Keep the summary in the same order as the scenarios were given
+        self.results.sort(key = lambda result: self.scenarios.index(result["scenario"]))
+        self.print_summary()
+        return self.results
+
+    def report(self, result):
+        self.results.append(result)
+        print(f"  {('+' if result['status'] == 'Success' else '-')} {result['scenario']}: {result['status']} "
+              f"({result['sim_time']} s simulated, {result['wall_time']:.2f} s wall, {result['tick_rate']:.0f} ticks/s)")
+        if result["error"]:
+            print(f"      {result['error']}")
+
+    def print_summary(self):
+        name_width = max([len("Scenario")] + [len(SimulatorUtilities.get_filename_without_extension(r["scenario"])) for r in self.results])
+        header = f"{'Scenario':<{name_width}}  {'Outcome':<14}  {'Sim Time (s)':>12}  {'Wall (s)':>9}  {'Ticks':>7}  {'Ticks/s':>9}"
+        print()
+        print(header)
+        print("-" * len(header))
+        for result in self.results:
+            print(f"{SimulatorUtilities.get_filename_without_extension(result['scenario']):<{name_width}}  {result['status']:<14}  "
+                  f"{result['sim_time']:>12.1f}  {result['wall_time']:>9.2f}  {result['ticks']:>7}  {result['tick_rate']:>9.0f}")
+        print("-" * len(header))
+        counts = {outcome: 0 for outcome in self.OUTCOMES}
+        for result in self.results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        print("  ".join(f"{outcome}: {count}" for outcome, count in counts.items()))
+        total_ticks = sum(r["ticks"] for r in self.results)
+        print(f"Total: {len(self.results)} scenarios, {total_ticks} ticks in {self.elapsed_time:.2f} s ({total_ticks / self.elapsed_time if self.elapsed_time > 0 else 0:.0f} ticks/s overall)")
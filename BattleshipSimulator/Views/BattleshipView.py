@@ -8,11 +8,14 @@ class BattleshipViewCLI():
         self.elapsed_time = 0
         self.controller = controller
     
-    def start(self, timedelta = .5):
+    def start(self, timedelta = .5, step_controller = None):
         print(f"Running {self.controller.get_attribute('Simulation:config_file')}")
         while self.controller.get_attribute("Simulation:simulation_running"):
-            self.on_update(timedelta)
+            # An adaptive step controller takes larger steps while the sea is clear
+            self.on_update(timedelta if step_controller is None else step_controller.next_timestep())
         print(f"  {('+' if self.controller.get_attribute('Simulation:simulation_status') == 'Success' else '-')} Simulation {('successful' if self.controller.get_attribute('Simulation:simulation_status') == 'Success' else 'failed')} in {self.elapsed_time} seconds")
+        test_counters = self.controller.get_attribute("Simulation:World:sensor").test_counters
+        print(f"    {test_counters['exact']} of {test_counters['tests']} contact tests run exactly ({test_counters['index_culled']} rejected by the obstacle index, {test_counters['broad_phase_culled']} by the broad phase)")
     
     def on_update(self, timedelta):
         self.elapsed_time += timedelta
@@ -128,6 +131,11 @@ class BattleshipViewGUI(arcade.View):
         current_ship["current_battleship_graphic"] = current_ship["ship_shape_list"][current_ship["collision_index"]]
     
     def on_update(self, timedelta):
+        # Hold the controller's lock so a scheduler thread can't step the simulation while it is sampled
+        with self.controller.lock:
+            self.sample_update(timedelta)
+
+    def sample_update(self, timedelta):
         # Check the size of the window (for Linux and Mac)
         left, screen_width, bottom, screen_height = arcade.get_viewport()
         if self.screen_width != screen_width or self.screen_height != screen_height:
@@ -164,11 +172,15 @@ class BattleshipViewGUI(arcade.View):
             if not self.pause_simulation:
                 # Update the models
                 if self.controller.get_attribute("Simulation:simulation_running"):
-                    # If the constant
-                    sim_timedelta = self.SIM_TIMEDELTA_CONSTANT if self.SIM_TIMEDELTA_CONSTANT > 0 else timedelta
-                    for _ in range(self.SIM_TIME_MULTIPLIER):
-                        self.simulation_time += sim_timedelta
-                        self.controller.update(sim_timedelta)
+                    if self.controller.scheduler is None:
+                        # If the constant
+                        sim_timedelta = self.SIM_TIMEDELTA_CONSTANT if self.SIM_TIMEDELTA_CONSTANT > 0 else timedelta
+                        for _ in range(self.SIM_TIME_MULTIPLIER):
+                            self.simulation_time += sim_timedelta
+                            self.controller.update(sim_timedelta)
+                    else:
+                        # The scheduler steps the simulation on its own clock; only sample the latest state
+                        self.simulation_time = self.controller.get_attribute("Simulation:total_time")
                     # The model that is displayed depends on the collision state (none, warning, event)
                     for ship_id, current_ship in self.ship_models.items():
                         if not self.get_model_attribute(ship_id, "RadarSonar:collision_warning"):
@@ -211,7 +223,10 @@ class BattleshipViewGUI(arcade.View):
         """
         Draws the battleship's representation and information on the screen.
         """
+        with self.controller.lock:
+            self.draw_simulation()
 
+    def draw_simulation(self):
         self.clear()
         arcade.start_render()
 
@@ -580,6 +595,7 @@ class BattleshipViewGUI(arcade.View):
         self.controller.restart()
         self.restart_flag = False
         self.pause_simulation = False
+        self.simulation_time = 0
 
     def get_model_attribute(self, model_id, attribute):
         return self.controller.get_attribute(f"Simulation:World:{model_id}:{attribute}")
@@ -2,6 +2,9 @@
 import BattleshipSimulator.BattleshipController as BattleCtrl
 import BattleshipSimulator.Models.Environment as Environment
 import BattleshipSimulator.Views.BattleshipView as BattleGUI
+import BattleshipSimulator.Views.BattleshipSweep as BattleSweep
+import BattleshipSimulator.Views.BattleshipEnsemble as BattleEnsemble
+from BattleshipSimulator.Models.TimeStepping import AdaptiveStepController
 import arcade
 import argparse
 import os
@@ -22,10 +25,29 @@ def parse_arguments():
     parser = argparse.ArgumentParser(description="Process mode and scenario")
     # Adding the 'mode' argument with a default value
     parser.add_argument('--mode', type=str, default='gui',
-                        help='Mode of operation. Default is "gui".')
+                        help='Mode of operation: "gui", "cli" or "ensemble". Default is "gui".')
     # Adding the 'scenario' argument with a default value
     parser.add_argument('--scenario', type=str, default="scenarios/scenario-gen-0.yaml",
                         help='Scenario to run. Default is "scenarios/scenario-gen-0.yaml".')
+    # Adding the sweep arguments (only used when the scenario is a directory)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of worker processes used to run a directory of scenarios. Default is 1.')
+    # Adding the ensemble arguments (only used in ensemble mode)
+    parser.add_argument('--members', type=int, default=100,
+                        help='Number of perturbed runs of the scenario in ensemble mode. Default is 100.')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the ensemble perturbations. Default is 0.')
+    parser.add_argument('--telemetry-port', type=int, default=5556,
+                        help='ZMQ telemetry port. In a parallel sweep, each worker publishes on this port plus its worker index. Default is 5556.')
+    parser.add_argument('--no-telemetry', action='store_true',
+                        help='Disable ZMQ telemetry publishing.')
+    # Adding the adaptive time step argument (only used in the headless modes)
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Take larger time steps while no ship has anything in radar range and every ship is on a straight leg.')
+    # Adding the simulation clock argument (only used in GUI mode)
+    parser.add_argument('--time-ratio', type=float, default=None,
+                        help='Run the simulation on its own fixed-step clock at this many simulated seconds per real second '
+                             '(0 runs as fast as possible). By default, the simulation is stepped once per frame.')
     # Parse the arguments
     args = parser.parse_args()
     return args
@@ -59,18 +81,19 @@ def main():
     """ The entry point into the application
     """
     args = parse_arguments()
+    zmq_port = None if args.no_telemetry else args.telemetry_port
     # If the scenario is a directory, run all the scenarios contained within it
     # This mode forces the program to operate in CLI
     if os.path.isdir(args.scenario):
-        for scenario_cfg in get_yaml_files(args.scenario):
-            simulator = Environment.Simulator(scenario_cfg)
-            controller = BattleCtrl.BattleshipController(simulator)
-            simulator.start()
-            view = BattleGUI.BattleshipViewCLI(controller)
-            view.start()
+        view = BattleSweep.BattleshipViewSweep(sorted(get_yaml_files(args.scenario)), args.workers, zmq_port, adaptive = args.adaptive)
+        view.start()
+    # Run perturbed copies of a single scenario and report the outcome statistics (also CLI only)
+    elif args.mode == "ensemble":
+        view = BattleEnsemble.BattleshipViewEnsemble(args.scenario, args.members, args.seed, args.workers, zmq_port, adaptive = args.adaptive)
+        view.start()
     # Else, run a single scenario
     else:
-        simulator = Environment.Simulator(args.scenario)
+        simulator = Environment.Simulator(args.scenario, zmq_port = zmq_port)
         controller = BattleCtrl.BattleshipController(simulator)
         simulator.start()
         # If the mode is "gui", run the application with the GUI
@@ -78,13 +101,15 @@ def main():
             # Create the controller and view, set up the window, and start the GUI loop
             window = arcade.Window(SCREEN_WIDTH, SCREEN_HEIGHT, "Battleship Simulator", fullscreen = True)
             view = BattleGUI.BattleshipViewGUI(controller, SCREEN_WIDTH, SCREEN_HEIGHT)
+            if args.time_ratio is not None:
+                controller.start_scheduler(view.SIM_TIMEDELTA_CONSTANT, args.time_ratio)
             window.show_view(view)
             arcade.enable_timings()
             arcade.run()
         # Else, run the application with the CLI
         else:
             view = BattleGUI.BattleshipViewCLI(controller)
-            view.start()
+            view.start(step_controller = AdaptiveStepController(simulator) if args.adaptive else None)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,14 @@
+from tests.helpers import REPOSITORY, write_scenario
+import os
+import pytest
+
+@pytest.fixture
+def scenario_directory(tmp_path, monkeypatch):
+    # Scenarios are run from an empty directory, so the results are written to a new results/
+    os.symlink(os.path.join(REPOSITORY, "entity_configs"), tmp_path / "entity_configs")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def short_scenario(scenario_directory):
+    return write_scenario(scenario_directory, [[1150, 1000]])
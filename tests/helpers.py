@@ -0,0 +1,41 @@
+import BattleshipSimulator.Models.BattleshipModel as BattleModel
+import BattleshipSimulator.Models.BattleshipSystem as BattleSystem
+from BattleshipSimulator.Models.Environment import World
+from BattleshipSimulator.Models.GetterSetter import GetterSetter
+import os
+import yaml
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class Node(GetterSetter):
+
+    def __init__(self, **kwargs):
+        super().__init__()
+        for k, v in kwargs.items():
+            setattr(self, k, v)
+
+def square(x, y, size = 20):
+    return [(x, y), (x + size, y), (x + size, y + size), (x, y + size), (x, y)]
+
+def make_world(obstacles, ships):
+    world = World(obstacles = obstacles)
+    # The systems look the world up by its path from the simulator
+    GetterSetter().add_child("World", world)
+    for ship_id, (x, y) in ships.items():
+        model = BattleModel.BattleshipModel(world = world, x = x, y = y)
+        world.attach_model(ship_id, model)
+        for system_name in ["Engine", "Navigation", "RadarSonar"]:
+            getattr(BattleSystem, system_name)(model)
+    return world
+
+def write_scenario(directory, waypoints, obstacles = []):
+    # A single ship at (1000, 1000) heading east, succeeding when it reaches its last waypoint
+    scenario = {
+        "entities": [{"_configuration": "entity_configs/arleigh_burke.yaml", "_id": "PrimaryBattleship", "_Navigation": {"waypoints": waypoints}, "x": 1000, "y": 1000, "heading": 0}],
+        "success_conditions": {"World:PrimaryBattleship:Navigation:has_waypoints": False},
+        "failure_conditions": {"World:PrimaryBattleship:out_of_bounds": True, "World:PrimaryBattleship:RadarSonar:collision_event": True},
+        "world": {"guardrails": [[0, 0], [5000, 5000]], "obstacles": obstacles}
+    }
+    with open(os.path.join(directory, "scenario.yaml"), "w") as file:
+        yaml.safe_dump(scenario, file)
+    return "scenario.yaml"
@@ -69,4 +69,10 @@ def test_turn_options():
     assert calculate_turn_options(0, 90) == (-270,90)        # From North -> East  (three-quarter turn port or one-quarter turn starboard)
     assert calculate_turn_options(0, 180) == (-180,180)      # From North -> South (half turn port in either direction)
     assert calculate_turn_options(0, 270) == (-90,270)       # From North -> West  (one-quarter turn port or three-quarter turn starboard)
-    assert calculate_turn_options(90, 89) == (-1,359)
\ No newline at end of file
+    assert calculate_turn_options(90, 89) == (-1,359)
+
+def test_wrap_to_reference():
+    assert Utilities.wrap_to_reference(-30, 350) == 330      # Past the reference by a whole turn -> the near side
+    assert Utilities.wrap_to_reference(170, -175) == -190    # Across +-180
+    assert Utilities.wrap_to_reference(725, 0) == 5          # More than one turn away
+    assert Utilities.wrap_to_reference(-185, 0, 190) == -185 # Within the limit
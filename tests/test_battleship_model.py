@@ -0,0 +1,26 @@
+from BattleshipSimulator.Supervisor.Navigators import VisibilityGraphNavigator
+from tests.helpers import make_world
+import math
+
+def turned_past_south(planned):
+    world = make_world([], {"Ship": (1000, 1000)})
+    model = world.models["Ship"]
+    if planned:
+        model.supervisor = VisibilityGraphNavigator(model)
+        model.supervisor.attach(world, "Ship")
+    model.current_speed = 5
+    # The ship has turned to port past 180 degrees: the autopilot's heading is 350 (i.e. -10)
+    model.oldEta[5] = math.radians(350)
+    model.heading = -10
+    model.chosen_direction = "port"
+    # A waypoint 20 degrees to starboard
+    model.children["Navigation"].waypoints = [(1000 + 1000 * math.cos(math.radians(-30)), 1000 + 1000 * math.sin(math.radians(-30)))]
+    assert model.decide()
+    return model
+
+def test_planned_heading_stays_within_half_a_turn_of_the_autopilot():
+    # -30 would have the autopilot turn 380 degrees to starboard, off of the planned leg
+    assert math.isclose(turned_past_south(planned = True).chosen_heading, 330)
+
+def test_unplanned_heading_is_given_to_the_autopilot_as_chosen():
+    assert math.isclose(turned_past_south(planned = False).chosen_heading, -30)
@@ -0,0 +1,37 @@
+import numpy as np
+import shapely
+from BattleshipSimulator.Models.ClearanceField import ClearanceField
+
+def make_obstacles():
+    return np.array([shapely.box(0, 0, 100, 100), shapely.box(300, 0, 320, 500)], dtype = object)
+
+def test_clearance_matches_the_distance_to_land(tmp_path):
+    obstacles = make_obstacles()
+    field = ClearanceField(obstacles, resolution = 5, margin = 200, cache_dir = str(tmp_path))
+    x, y = np.random.default_rng(0).uniform(-500, 800, (2, 500))
+    land = shapely.union_all(obstacles)
+    points = shapely.points(x, y)
+    expected = shapely.distance(points, land)
+    inside = shapely.contains(land, points)
+    expected[inside] = -shapely.distance(points[inside], land.boundary)
+    assert np.all(np.abs(field.clearance(x, y) - expected) <= field.error_bound)
+    assert field.clearance(50, 50) < 0 and field.clearance(200, 50) > 0
+    # Away from the first obstacle, and off the grid
+    assert field.gradient(150, 50)[0] > 0
+    assert np.allclose(field.gradient(-1000, 50), [-1, 0])
+
+def test_field_is_cached_by_obstacles(tmp_path):
+    field = ClearanceField(make_obstacles(), resolution = 10, margin = 100, cache_dir = str(tmp_path))
+    assert len(list(tmp_path.iterdir())) == 1
+    assert np.array_equal(ClearanceField(make_obstacles(), resolution = 10, margin = 100, cache_dir = str(tmp_path)).values, field.values)
+    ClearanceField(make_obstacles()[:1], resolution = 10, margin = 100, cache_dir = str(tmp_path))
+    assert len(list(tmp_path.iterdir())) == 2
+
+def test_corrupt_cache_is_rebuilt(tmp_path):
+    field = ClearanceField(make_obstacles(), resolution = 10, margin = 100, cache_dir = str(tmp_path))
+    cache_file = next(tmp_path.iterdir())
+    # Truncated, as if the run writing it was killed
+    cache_file.write_bytes(cache_file.read_bytes()[:100])
+    assert np.array_equal(ClearanceField(make_obstacles(), resolution = 10, margin = 100, cache_dir = str(tmp_path)).values, field.values)
+    assert [path.name for path in tmp_path.iterdir()] == [cache_file.name]
+    assert np.array_equal(np.load(cache_file), field.values)
@@ -0,0 +1,48 @@
+import BattleshipSimulator.Models.Conditions as Conditions
+from tests.helpers import Node
+import pytest
+
+def build_tree():
+    root = Node()
+    world = Node()
+    root.add_child("World", world)
+    world.add_child("Ship", Node(x = 0, y = 0, speed = 5, out_of_bounds = False))
+    world.add_child("Other", Node(x = 300, y = 400, speed = 0, out_of_bounds = False))
+    return root, world.get_child("Ship")
+
+def test_equality_is_any_of():
+    root, ship = build_tree()
+    check = Conditions.compile_conditions(root, {"World:Ship:out_of_bounds": True, "World:Other:out_of_bounds": True})
+    assert not check()
+    ship.out_of_bounds = True
+    assert check()
+
+def test_thresholds_are_anded():
+    root, ship = build_tree()
+    check = Conditions.compile_conditions(root, {"World:Ship:speed": {"gt": 1, "<=": 10}})
+    assert check()
+    ship.speed = 11
+    assert not check()
+
+def test_within():
+    root, ship = build_tree()
+    point_check = Conditions.compile_conditions(root, {"World:Ship": {"within": 100, "of": [60, 80]}})
+    object_check = Conditions.compile_conditions(root, {"World:Ship": {"within": 499, "of": "World:Other"}})
+    assert point_check()
+    assert not object_check()
+    ship.x = 10
+    assert object_check()
+
+def test_any_all_composition():
+    root, ship = build_tree()
+    check = Conditions.compile_conditions(root, {"all": [{"World:Ship:speed": {"ge": 5}}, {"any": [{"World:Ship:x": 1}, {"World:Other:speed": 0}]}]})
+    assert check()
+    ship.speed = 4
+    assert not check()
+
+def test_invalid_conditions():
+    root, _ = build_tree()
+    with pytest.raises(RuntimeError):
+        Conditions.compile_conditions(root, {"World:Ship:speed": {"about": 5}})
+    with pytest.raises(KeyError):
+        Conditions.compile_conditions(root, {"World:Missing:speed": 5})
@@ -0,0 +1,36 @@
+from BattleshipSimulator.Models.ConfigurationSpace import ConfigurationSpaceMap
+from BattleshipSimulator.Supervisor.Navigators import PointAvoidanceNavigator
+from shapely.geometry import Polygon
+from tests.helpers import make_world, square
+
+def test_configuration_space_inflates_each_obstacle_once():
+    configuration_space = ConfigurationSpaceMap(max_entries = 2)
+    inflated, coords = configuration_space.inflate(Polygon(square(0, 0)), 10)
+    # An equal obstacle (e.g. seen again on the next tick) reuses the inflated geometry
+    assert configuration_space.inflate(Polygon(square(0, 0)), 10)[0] is inflated
+    assert configuration_space.hits == 1 and configuration_space.misses == 1
+    assert inflated.equals(Polygon(square(0, 0)).buffer(10)) and coords == list(inflated.exterior.coords)
+    configuration_space.inflate(Polygon(square(0, 0)), 20)
+    configuration_space.inflate(Polygon(square(50, 0)), 10)
+    assert configuration_space.inflate(Polygon(square(0, 0)), 10)[0] is not inflated
+
+def test_point_avoidance_reuses_inflated_obstacles_across_ticks():
+    # Two obstacles in radar range, one of them dead ahead
+    world = make_world([square(1200, 990), square(1500, 1300)], {"Ship": (1000, 1000)})
+    model = world.models["Ship"]
+    model.heading = model.chosen_heading = 0
+    world.sensor.sense()
+    radar_sonar = model.children["RadarSonar"]
+    radar_sonar.update(.5)
+    radar_sonar.collision_warning = True
+    assert len(radar_sonar.radar_geometries) == 2
+    navigator = PointAvoidanceNavigator(model)
+    # As a ship configured with collision_avoidance: PointAvoidanceNavigator
+    model.add_child("CollisionAvoidance", navigator)
+    configuration_space = world.configuration_space
+    navigator.override()
+    assert (configuration_space.misses, configuration_space.hits) == (2, 0)
+    assert len(navigator.relevant_objects) == 1
+    for tick in range(3):
+        navigator.override()
+        assert (configuration_space.misses, configuration_space.hits) == (2, 2 * (tick + 1))
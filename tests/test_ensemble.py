@@ -0,0 +1,36 @@
+from BattleshipSimulator.Views.BattleshipEnsemble import BattleshipViewEnsemble, member_rng, perturb_scenario
+
+SCENARIO = {
+    "entities": [{
+        "_configuration": "entity_configs/arleigh_burke.yaml",
+        "_id": "PrimaryBattleship",
+        "_Navigation": {"waypoints": [[1000, 1000]]},
+        "x": 100,
+        "y": 200
+    }]
+}
+
+def test_perturbations_are_seeded_per_member():
+    first = perturb_scenario(SCENARIO, member_rng(7, 3))
+    assert first == perturb_scenario(SCENARIO, member_rng(7, 3))
+    assert first != perturb_scenario(SCENARIO, member_rng(7, 4))
+    # The template isn't modified
+    assert SCENARIO["entities"][0]["x"] == 100 and "_RadarSonar" not in SCENARIO["entities"][0]
+
+def test_unperturbed_values_come_from_the_entity_config():
+    entity = perturb_scenario(SCENARIO, member_rng(0, 0), {"radar_range": 0, "speed": 0})["entities"][0]
+    assert entity["_RadarSonar"]["radar_range"] == 1400
+    assert entity["speed"] == 3
+    assert entity["x"] == 100 and entity["_Navigation"]["waypoints"] == [[1000, 1000]]
+
+def test_parallel_members_match_serial_members(short_scenario):
+    def run(workers):
+        ensemble = BattleshipViewEnsemble(short_scenario, 4, seed = 1, workers = workers, spread = {"heading": 5, "position": 20})
+        statistics = ensemble.start()
+        assert sum(statistics["outcomes"].values()) == 4
+        return [{key: value for key, value in result.items() if key != "wall_time"} for result in ensemble.results]
+    serial = run(1)
+    # No member fails for reasons outside of the scenario (e.g. creating the results directory)
+    assert [result["error"] for result in serial] == [""] * 4
+    # Each member's perturbation depends only on the seed and the member, not on the worker that ran it
+    assert run(2) == serial
@@ -0,0 +1,63 @@
+from tests.helpers import Node
+import pytest
+
+def test_resolve_reads_and_writes_through_the_tree():
+    root = Node()
+    world = Node()
+    ship = Node(value = 5)
+    root.add_child("World", world)
+    world.add_child("Ship", ship)
+    handle = root.resolve("World:Ship:value")
+    assert handle.get() == 5
+    handle.set(7)
+    assert ship.value == 7
+    assert root.get_attribute("World:Ship:value") == 7
+    # Paths that aren't found below an object are looked up from its parent
+    assert ship.get_attribute("World:Ship:value") == 7
+
+def test_resolve_is_cached_and_invalidated_by_tree_changes():
+    root = Node()
+    world = Node()
+    root.add_child("World", world)
+    world.add_child("Ship", Node(value = 1))
+    handle = root.resolve("World:Ship:value")
+    assert root.resolve("World:Ship:value") is handle
+    # Replacing the world rebinds the existing handle on its next use
+    new_world = Node()
+    root.remove_child("World")
+    root.add_child("World", new_world)
+    new_world.add_child("Ship", Node(value = 2))
+    assert handle.get() == 2
+    # Creating objects outside of the tree keeps the handle bound
+    generation = handle.generation
+    Node(value = 3)
+    assert handle.get() == 2 and handle.generation == generation
+    root.remove_child("World")
+    with pytest.raises(KeyError):
+        handle.get()
+
+def test_resolve_unknown_path():
+    root = Node()
+    root.add_child("World", Node())
+    with pytest.raises(KeyError):
+        root.resolve("World:Missing:value")
+    with pytest.raises(KeyError):
+        root.get_attribute("Missing:value")
+
+def test_snapshot_state_restores_variables_and_histories():
+    root = Node(value = 1)
+    ship = Node(value = 2)
+    root.add_child("Ship", ship)
+    ship.snapshot_variables = ["value"]
+    ship.path = [(0, 0)]
+    ship.snapshot_histories = ["path"]
+    state = root.snapshot_state()
+    assert "Ship" in state["children"]
+    ship.value = 3
+    ship.path.append((1, 1))
+    root.restore_state(state)
+    assert ship.value == 2
+    assert ship.path == [(0, 0)]
+    ship.path.clear()
+    with pytest.raises(RuntimeError):
+        root.restore_state(state)
@@ -0,0 +1,42 @@
+from BattleshipSimulator.Models.Logger import LogColumn
+
+def test_scalar_columns_promote():
+    column = LogColumn()
+    for value in [1, 2, 2.5]:
+        column.append(value)
+    assert column.kind == "float"
+    assert [column.get(i) for i in range(3)] == [1, 2, 2.5]
+    column.append(None)
+    assert column.kind == "object"
+    assert column.get(3) is None and column.get(2) == 2.5
+
+def test_ragged_column_copies_rows():
+    column = LogColumn()
+    waypoints = [(1, 2), (3, 4)]
+    column.append(waypoints)
+    waypoints.pop(0)
+    column.append(waypoints)
+    column.append([])
+    assert column.kind == "ragged"
+    assert column.get(0) == [(1, 2), (3, 4)]
+    assert column.get(1) == [(3, 4)]
+    assert column.get(2) == []
+
+def test_columns_grow():
+    column = LogColumn()
+    for i in range(3 * LogColumn.INITIAL_CAPACITY):
+        column.append(i % 2 == 0)
+    assert column.kind == "bool"
+    assert column.get(3 * LogColumn.INITIAL_CAPACITY - 1) is False
+
+def test_publishers_release_their_ports(tmp_path):
+    from BattleshipSimulator.Models.Logger import CSVLogger
+    import zmq
+    logger = CSVLogger(str(tmp_path / "run.csv"), zmq_port = 47611)
+    logger.close()
+    CSVLogger.close_publishers()
+    assert CSVLogger.publishers == {}
+    # The port can be bound again
+    socket = zmq.Context.instance().socket(zmq.PUB)
+    socket.bind("tcp://127.0.0.1:47611")
+    socket.close(linger = 0)
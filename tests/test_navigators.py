@@ -0,0 +1,18 @@
+from BattleshipSimulator.Supervisor.Navigators import CollisionAvoidanceNavigator
+from shapely.geometry import Polygon
+from tests.helpers import make_world, square
+
+def test_collision_avoidance_turns_away_from_the_warning():
+    world = make_world([], {"Ship": (1000, 1000)})
+    model = world.models["Ship"]
+    model.heading = 0
+    radar_sonar = model.children["RadarSonar"]
+    radar_sonar.collision_warning = True
+    navigator = CollisionAvoidanceNavigator(model)
+    # Heading 0 is along +x, so the starboard sector is at -y and the port sector at +y
+    radar_sonar.warning_geometries = [Polygon(square(1200, 1000 - 25, 10))]
+    assert navigator.override() == {"heading": 50}
+    radar_sonar.warning_geometries = [Polygon(square(1200, 1000 + 15, 10))]
+    assert navigator.override() == {"heading": -50}
+    radar_sonar.warning_geometries = [Polygon(square(1200, 1000 + 2000, 10))]
+    assert navigator.override() == {}
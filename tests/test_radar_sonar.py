@@ -0,0 +1,86 @@
+import BattleshipSimulator.Models.SimulatorUtilities as Utilities
+from tests.helpers import make_world, square
+from shapely.geometry import Point, Polygon
+
+def test_coastline_is_sensed_within_radar_range():
+    # A coastline of obstacles, of which only the first few are within radar range
+    obstacles = [square(1090 + 100 * i, 1000) for i in range(200)]
+    world = make_world(obstacles, {"Ship": (1000, 1000)})
+    world.update(.5)
+    radar_sonar = world.models["Ship"].children["RadarSonar"]
+    assert len(radar_sonar.radar_objects) == 10
+    assert len(radar_sonar.radar_geometries) == 10
+    assert radar_sonar.collision_warning and not radar_sonar.collision_event
+    # Most of the coastline is rejected before any exact test
+    counters = world.sensor.test_counters
+    assert counters["tests"] == 400
+    assert counters["index_culled"] + counters["broad_phase_culled"] + counters["exact"] == counters["tests"]
+    assert world.sensor.exact_tests_avoided() >= 380
+
+def test_world_sensing_matches_sensing_each_ship_in_turn():
+    obstacles = [square(1090, 1000), square(900, 1500, 100), square(3000, 3000)]
+    ships = {"A": (1000, 1000), "B": (1000, 1200), "C": (1300, 1000)}
+    batched, single = make_world(obstacles, ships), make_world(obstacles, ships)
+    for _ in range(3):
+        batched.update(.5)
+        # Without the world's sensing pass, each RadarSonar senses on its own when it is updated
+        for model in single.models.values():
+            model.update(.5)
+    for ship_id in ships:
+        batched_radar_sonar = batched.models[ship_id].children["RadarSonar"]
+        single_radar_sonar = single.models[ship_id].children["RadarSonar"]
+        for k in ["radar_objects", "warning_objects", "collision_objects", "objects", "radar_object_distances", "collision_warning", "collision_event"]:
+            assert getattr(batched_radar_sonar, k) == getattr(single_radar_sonar, k)
+
+def test_rigid_transform_matches_transform_coordinates():
+    hull = Utilities.buffer_shape([(-10, -50), (10, -50), (10, 40), (0, 50), (-10, 40)], 100)
+    poses = [(0, 0, 0), (1234.5, -678.9, 33.3), (10, 20, 90), (-5, 7, 270), (3000, 4000, -400.25)]
+    vertices = Utilities.ring_vertices(hull)
+    expected = [Utilities.transform_coordinates(hull, x, y, heading) for x, y, heading in poses]
+    assert [Utilities.vertex_list(Utilities.rigid_transform(vertices, x, y, heading)) for x, y, heading in poses] == expected
+    x, y, heading = zip(*poses)
+    assert [Utilities.vertex_list(v) for v in Utilities.rigid_transform_many([vertices] * len(poses), x, y, heading)] == expected
+
+def test_circle_vertices_match_buffered_point():
+    for x, y, r in [(0, 0, 1000), (1234.5, -678.9, 1400), (10, 20, 1000)]:
+        assert Utilities.vertex_list(Utilities.circle_vertices(x, y, r)) == list(Point(x, y).buffer(r, quad_segs = 15).exterior.coords)
+
+def test_ships_only_see_hulls_in_nearby_cells():
+    world = make_world([], {"A": (1000, 1000), "B": (1500, 1000), "C": (9000, 9000)})
+    world.update(.5)
+    objects = {ship_id: world.models[ship_id].children["RadarSonar"].objects for ship_id in world.models}
+    assert len(objects["A"]) == 1 and len(objects["B"]) == 1 and len(objects["C"]) == 0
+    assert world.models["A"].children["RadarSonar"].radar_objects != []
+    assert world.contact_grid.query((8500, 8500, 9500, 9500)) == [2]
+
+def test_contact_distances_are_summarized():
+    coords, distances, summaries = Utilities.contact_distances([Polygon(square(3, 0, 1)), Polygon(square(0, -10, 2))], [(0, 0), (1, 1)])
+    assert coords[0] == square(3, 0, 1)
+    assert all(abs(d - Utilities.distance(c, (0, 0))) < 1e-12 for d, c in zip(distances[0], square(3, 0, 1)))
+    assert summaries[0]["min_distance"] == 3 and summaries[0]["closest_vertex"] == (3, 0)
+    assert abs(summaries[0]["mean_distance"] - (3 + 4 + 17 ** .5 + 10 ** .5) / 4) < 1e-12
+    # Of two equally close vertices, the first one is the closest
+    assert summaries[1]["closest_vertex"] == (2, -8)
+
+def test_hull_cannot_pass_through_a_thin_obstacle_between_passes():
+    wall = [(1200, 900), (1202, 900), (1202, 1100), (1200, 1100), (1200, 900)]
+    world = make_world([wall], {"Ship": (1000, 1000)})
+    model = world.models["Ship"]
+    radar_sonar = model.children["RadarSonar"]
+    # A long time step takes the ship from one side of the wall to the other
+    model.x = 1400
+    world.sensor.sense()
+    radar_sonar.update(.5)
+    assert radar_sonar.collision_event and radar_sonar.collision_objects == [wall]
+    assert radar_sonar.sensed_pose == (1400, 1000, model.heading)
+    # Moving on from the far side doesn't hit it again
+    model.x = 1600
+    world.sensor.sense()
+    radar_sonar.update(.5)
+    assert not radar_sonar.collision_event
+
+def test_circle_templates_are_bounded():
+    Utilities.circle_template.cache_clear()
+    for r in range(Utilities.CIRCLE_TEMPLATE_CACHE_SIZE + 10):
+        Utilities.circle_vertices(0, 0, 1000 + r)
+    assert Utilities.circle_template.cache_info().currsize == Utilities.CIRCLE_TEMPLATE_CACHE_SIZE
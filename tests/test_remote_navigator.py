@@ -0,0 +1,79 @@
+import time
+from BattleshipSimulator.Supervisor.LocalSupervisor import LocalSupervisor, BenchmarkModel
+from BattleshipSimulator.Supervisor.Navigators import BaseRemoteNavigator
+
+def test_synchronous_navigator_reuses_its_session():
+    with LocalSupervisor(response = {"heading": 90}) as supervisor:
+        navigator = BaseRemoteNavigator(BenchmarkModel(), supervisor.url, timeout = 2)
+        assert navigator.override() == {"heading": 90}
+        assert navigator.override() == {"heading": 90}
+        assert not navigator.is_error
+        assert BaseRemoteNavigator.get_session(supervisor.url) is BaseRemoteNavigator.get_session(supervisor.url)
+        assert supervisor.requests_served == 2
+
+def test_asynchronous_navigator_uses_the_previous_response():
+    with LocalSupervisor(latency = .05, response = {"heading": 90}) as supervisor:
+        navigator = BaseRemoteNavigator(BenchmarkModel(), supervisor.url, timeout = 2, asynchronous = True)
+        # Nothing has been answered on the first tick
+        assert navigator.override() == {}
+        # The request sent on the first tick is waited for, as it is the oldest that may be used
+        assert navigator.override() == {"heading": 90}
+        assert navigator.latest_response[0] == 1
+        time.sleep(.2)
+        assert navigator.override() == {"heading": 90}
+        assert navigator.latest_response[0] == 2
+        assert not navigator.is_error
+
+def test_asynchronous_navigator_drops_stale_responses():
+    with LocalSupervisor(latency = .3, response = {"heading": 90}) as supervisor:
+        navigator = BaseRemoteNavigator(BenchmarkModel(), supervisor.url, timeout = .05, asynchronous = True, max_staleness = 1)
+        assert navigator.override() == {}
+        # The response doesn't arrive within the timeout, so there is no override
+        assert navigator.override() == {}
+        time.sleep(.4)
+        assert navigator.override() == {}
+        assert navigator.is_error
+
+def test_batched_navigators_share_one_request():
+    from BattleshipSimulator.Models.Environment import World
+    from BattleshipSimulator.Supervisor.Navigators import BatchedRemoteNavigator
+    requests_seen = []
+    def respond(request):
+        requests_seen.append(request)
+        return {"ships": request["ships"][::-1], "heading": [None, 45], "speed": [0, None]}
+    with LocalSupervisor(response = respond) as supervisor:
+        world = World()
+        navigators = {}
+        for model_id, x in [("A", 1.), ("B", 2.)]:
+            model = BenchmarkModel()
+            model.x = x
+            navigators[model_id] = BatchedRemoteNavigator(model, supervisor.url, timeout = 2)
+            navigators[model_id].attach(world, model_id)
+        assert list(world.remote_batches) == [supervisor.url]
+        world.remote_batches[supervisor.url].exchange()
+        assert requests_seen == [{"ships": ["A", "B"], "x": [1., 2.], "y": [0., 0.], "heading": [0., 0.]}]
+        # The response lists the ships in reverse
+        assert navigators["A"].override() == {"heading": 45}
+        assert navigators["B"].override() == {"speed": 0}
+        assert supervisor.requests_served == 1
+
+def test_unattached_batched_navigator_sends_its_own_request():
+    from BattleshipSimulator.Supervisor.Navigators import BatchedRemoteNavigator
+    with LocalSupervisor(response = {"heading": 90}) as supervisor:
+        navigator = BatchedRemoteNavigator(BenchmarkModel(), supervisor.url, timeout = 2)
+        assert navigator.override() == {"heading": 90}
+        assert not navigator.is_error and supervisor.requests_served == 1
+
+def test_each_thread_posts_through_its_own_session():
+    with LocalSupervisor(response = {"heading": 90}) as supervisor:
+        navigators = [BaseRemoteNavigator(BenchmarkModel(), supervisor.url, timeout = 2, asynchronous = True) for _ in range(4)]
+        for navigator in navigators:
+            navigator.override()
+        sessions = [BaseRemoteNavigator.get_executor().submit(BaseRemoteNavigator.get_session, supervisor.url) for _ in range(8)]
+        assert BaseRemoteNavigator.get_session(supervisor.url) not in [future.result() for future in sessions]
+        BaseRemoteNavigator.shutdown()
+        assert BaseRemoteNavigator.executor is None and BaseRemoteNavigator.all_sessions == []
+        # The requests in flight were finished, and the next ones start new threads and sessions
+        assert [navigator.override() for navigator in navigators] == [{"heading": 90}] * 4
+        assert navigators[0].override() == {"heading": 90}
+        assert BaseRemoteNavigator.executor is not None and not navigators[0].is_error
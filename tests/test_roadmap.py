@@ -0,0 +1,30 @@
+import numpy as np
+import shapely
+from BattleshipSimulator.Models.Roadmap import VisibilityGraph
+
+def make_wall():
+    # A wall across the straight line between the test points, with a gap far to the north
+    return np.array([shapely.box(450, -1000, 550, 600), shapely.box(450, 900, 550, 2000)], dtype = object)
+
+def test_path_goes_around_obstacles_with_clearance():
+    obstacles = make_wall()
+    # The south end of the wall is out of bounds
+    bounds = (-200, -900, 1200, 1900)
+    graph = VisibilityGraph(obstacles, 50, bounds)
+    assert not graph.is_visible((0, 0), (1000, 0))
+    path = graph.shortest_path((0, 0), (1000, 0))
+    assert path[0] == (0., 0.) and path[-1] == (1000., 0.)
+    route = shapely.LineString(path)
+    # Through the gap, and never closer to the wall than the clearance
+    assert np.all(np.asarray(path)[1:-1, 1] > 600)
+    assert shapely.distance(route, shapely.union_all(obstacles)) >= 50 - graph.EDGE_TOLERANCE
+    # A gap narrower than twice the clearance is closed
+    assert VisibilityGraph(obstacles, 200, bounds).shortest_path((0, 0), (1000, 0)) is None
+
+def test_path_may_leave_the_clearance_of_its_start():
+    graph = VisibilityGraph(make_wall(), 50)
+    # The start is 20 m from the wall: heading away from it (or along it) is allowed, closing in on it isn't
+    assert graph.is_visible((430, 0), (0, 0))
+    assert graph.is_visible((430, 0), (430, 500))
+    assert not graph.is_visible((430, 0), (445, 650))
+    assert graph.shortest_path((430, 0), (1000, 0)) is not None
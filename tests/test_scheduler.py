@@ -0,0 +1,55 @@
+import BattleshipSimulator.BattleshipController as BattleCtrl
+from types import SimpleNamespace
+
+class Clock:
+    # Stands in for the time module: sleeping advances the clock instead of waiting
+    def __init__(self):
+        self.now = 0.
+
+    def perf_counter(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+class Controller:
+    # Steps nothing, but records the wall-clock time of every step, and stalls once
+    def __init__(self, clock, stall_tick, stall, duration):
+        self.clock = clock
+        self.stall_tick = stall_tick
+        self.stall = stall
+        self.duration = duration
+        self.simulation = SimpleNamespace(simulation_running = True, simulation_paused = False)
+        self.tick_times = []
+        self.scheduler = None
+
+    def update(self, timedelta):
+        self.tick_times.append(self.clock.now)
+        if len(self.tick_times) == self.stall_tick:
+            self.clock.now += self.stall
+        if self.clock.now >= self.duration:
+            self.scheduler.running = False
+
+def run(monkeypatch, stall, duration = 2, timestep = .5, real_time_ratio = 10):
+    clock = Clock()
+    monkeypatch.setattr(BattleCtrl, "time", clock)
+    controller = Controller(clock, 5, stall, duration)
+    controller.scheduler = BattleCtrl.SimulationScheduler(controller, timestep, real_time_ratio)
+    controller.scheduler.running = True
+    controller.scheduler.run()
+    return controller.tick_times
+
+def test_scheduler_catches_up_after_a_short_stall(monkeypatch):
+    # At the view's 0.5 s step and 10 times real time, a tick is due every 0.05 s
+    tick_times = run(monkeypatch, stall = .2)
+    # The four ticks missed during the stall are taken back to back, and every tick is still taken
+    assert tick_times[5:9] == [tick_times[4] + .2] * 4
+    assert len(tick_times) == 41
+
+def test_scheduler_drops_a_long_stall(monkeypatch):
+    tick_times = run(monkeypatch, stall = 1)
+    # Catching up on more than MAX_LAG is given up: the tick due at 0.25 s is taken late, and the
+    # nineteen due during the rest of the stall aren't taken
+    assert BattleCtrl.SimulationScheduler.MAX_LAG < 1
+    assert tick_times[5] == tick_times[4] + 1 and tick_times[6] > tick_times[5]
+    assert len(tick_times) == 41 - 19
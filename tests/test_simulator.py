@@ -0,0 +1,53 @@
+from BattleshipSimulator.Models.Environment import Simulator
+from tests.helpers import square, write_scenario
+import os
+
+def capture(simulator):
+    ships = {}
+    for ship_id, model in simulator.world.models.items():
+        ships[ship_id] = (model.x, model.y, model.heading, model.chosen_heading, model.current_speed, model.oldEta.tolist(), model.oldNu.tolist(),
+            model.simData.tolist(), list(model.children["Navigation"].actual_path), list(model.children["Navigation"].waypoints))
+    return simulator.total_time, simulator.simulation_running, ships
+
+def test_restored_snapshot_replays_the_run(short_scenario):
+    simulator = Simulator(short_scenario, zmq_port = None)
+    simulator.start()
+    for _ in range(10):
+        simulator.update(.5)
+    snapshot = simulator.snapshot()
+    at_snapshot = capture(simulator)
+    for _ in range(20):
+        simulator.update(.5)
+    advanced = capture(simulator)
+    # Still mid-run, so the replay covers ordinary ticks
+    assert simulator.simulation_running and advanced != at_snapshot
+    simulator.restore(snapshot)
+    assert capture(simulator) == at_snapshot
+    for _ in range(20):
+        simulator.update(.5)
+    assert capture(simulator) == advanced
+
+def test_restart_resets_the_ships_and_keeps_the_geometry(scenario_directory):
+    simulator = Simulator(write_scenario(scenario_directory, [[1150, 1000]], [square(3000, 3000)]), zmq_port = None)
+    world = simulator.world
+    static_geometry = world.static_geometry()
+    simulator.start()
+    while simulator.simulation_running:
+        simulator.update(.5)
+    assert simulator.simulation_status == "Success"
+    finished_file = simulator.logger.filename
+    finished = (simulator.total_time, world.models["PrimaryBattleship"].x, world.models["PrimaryBattleship"].y)
+    simulator.restart()
+    assert simulator.world is not world
+    assert (simulator.simulation_status, simulator.total_time, simulator.simulation_running) == ("Unknown", 0, False)
+    model = simulator.world.models["PrimaryBattleship"]
+    assert (model.x, model.y) == (1000, 1000) and [tuple(waypoint) for waypoint in model.children["Navigation"].waypoints] == [(1150, 1000)]
+    # A new results file, next to the finished one
+    assert simulator.logger.filename != finished_file and os.path.exists(simulator.logger.filename) and os.path.exists(finished_file)
+    # The geometry built from the obstacles is reused as it is
+    assert all(getattr(simulator.world, k) is v for k, v in static_geometry.items())
+    # The restarted run is the same as the first one
+    simulator.start()
+    while simulator.simulation_running:
+        simulator.update(.5)
+    assert simulator.simulation_status == "Success" and (simulator.total_time, model.x, model.y) == finished
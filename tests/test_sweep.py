@@ -0,0 +1,26 @@
+import BattleshipSimulator.BattleshipController as BattleCtrl
+from BattleshipSimulator.Views.BattleshipSweep import BattleshipViewSweep, run_scenario
+import os
+
+def test_parallel_workers_share_the_results_directory(short_scenario):
+    results = BattleshipViewSweep([short_scenario] * 4, workers = 2, zmq_port = None).start()
+    assert [result["error"] for result in results] == [""] * 4
+    assert [result["status"] for result in results] == ["Success"] * 4
+    assert len(os.listdir("results")) == 4
+
+def test_workers_release_their_telemetry_ports(short_scenario):
+    import zmq
+    # Run in this process, which outlives the sweep like a long-lived worker would
+    results = BattleshipViewSweep([short_scenario] * 2, workers = 1, zmq_port = 47620).start()
+    assert [result["error"] for result in results] == [""] * 2
+    socket = zmq.Context.instance().socket(zmq.PUB)
+    socket.bind("tcp://127.0.0.1:47620")
+    socket.close(linger = 0)
+
+def test_failed_runs_close_their_results_file(short_scenario, monkeypatch):
+    def fail(self, timedelta):
+        raise RuntimeError("Tick failed")
+    monkeypatch.setattr(BattleCtrl.BattleshipController, "update", fail)
+    result = run_scenario(short_scenario)
+    assert result["error"] == "RuntimeError: Tick failed"
+    assert [name[-10:] for name in os.listdir("results")] == ["_Error.csv"]
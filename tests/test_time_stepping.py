@@ -0,0 +1,47 @@
+from BattleshipSimulator.Models.Environment import Simulator
+from BattleshipSimulator.Models.TimeStepping import AdaptiveStepController
+from tests.helpers import square, write_scenario
+import math
+
+def run(scenario, base_timestep = .5, max_timestep = 10):
+    simulator = Simulator(scenario, zmq_port = None)
+    step_controller = AdaptiveStepController(simulator, base_timestep, max_timestep)
+    model = simulator.world.models["PrimaryBattleship"]
+    navigation = model.children["Navigation"]
+    simulator.start()
+    ticks = []
+    while simulator.simulation_running:
+        step = step_controller.next_timestep()
+        waypoint = navigation.waypoints[0]
+        ticks.append({
+            "step": step, "x": model.x, "waypoints": len(navigation.waypoints), "speed": math.hypot(*simulator.world.state.nu[model.state_index, :2]),
+            "waypoint_distance": math.hypot(waypoint[0] - model.x, waypoint[1] - model.y) - navigation.ALLOWED_DISTANCE_ERROR,
+            "warning": model.children["RadarSonar"].collision_warning
+        })
+        simulator.update(step)
+    return simulator, ticks
+
+def test_steps_shrink_near_obstacles_and_turns(scenario_directory):
+    # An obstacle 500 m to the side of the first leg, and a turn at the end of it
+    simulator, ticks = run(write_scenario(scenario_directory, [[4000, 1000], [4000, 4000]], [square(2500, 1500, 50)]))
+    assert simulator.simulation_status == "Success"
+    steps = [tick["step"] for tick in ticks]
+    # Every step is on the base grid, within the bounds
+    assert all(.5 <= step <= 10 and step / .5 == round(step / .5) for step in steps)
+    abeam = [tick["step"] for tick in ticks if abs(tick["x"] - 2500) < 100]
+    before = [tick["step"] for tick in ticks if 1500 < tick["x"] < 2000]
+    after = [tick["step"] for tick in ticks if 3000 < tick["x"] < 3500]
+    # Clear water before and after the obstacle takes the largest step, and it shrinks abeam of it
+    assert max(abeam) < 10 and set(before) == {10} and set(after) == {10}
+    # The turn at the first waypoint is taken at the base step
+    turn = next(i for i, tick in enumerate(ticks) if tick["waypoints"] == 1)
+    assert steps[turn - 1] == steps[turn] == .5
+    # A step never carries the ship past the acceptance circle of its waypoint
+    assert all(tick["step"] == .5 or tick["speed"] * tick["step"] <= tick["waypoint_distance"] + 1e-9 for tick in ticks)
+
+def test_steps_stay_at_the_base_step_while_warned(scenario_directory):
+    # Within the minimum safe distance of the obstacle for much of the leg
+    simulator, ticks = run(write_scenario(scenario_directory, [[4000, 1000]], [square(2500, 1200, 50)]), max_timestep = 4)
+    assert any(tick["warning"] for tick in ticks)
+    assert all(tick["step"] == .5 for tick in ticks if tick["warning"])
+    assert max(tick["step"] for tick in ticks) == 4
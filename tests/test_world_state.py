@@ -0,0 +1,48 @@
+import BattleshipSimulator.Models.SimulatorUtilities as Utilities
+from BattleshipSimulator.Models.WorldState import WorldState
+from BattleshipSimulator.python_vehicle_simulator.vehicles import frigate
+import numpy as np
+
+def test_vectorized_step_matches_scalar_step():
+    # Ships with different speeds, starting points and heading setpoints
+    ships = [(3, 100, 200, 45), (6, 2000, 1500, -90), (9, 4000, 300, 170)]
+    state = WorldState()
+    scalar_ships = []
+    for speed, x, y, heading in ships:
+        vehicle = frigate('headingAutopilot', speed, 0)
+        eta = np.array([x, y, 0, 0, 0, 0], float)
+        state.add_ship(vehicle, eta, vehicle.nu, vehicle.u_actual)
+        scalar_vehicle = frigate('headingAutopilot', speed, 0)
+        scalar_ships.append([scalar_vehicle, eta.copy(), scalar_vehicle.nu, scalar_vehicle.u_actual])
+    for _ in range(200):
+        sim_data = state.step([0, 1, 2], [ship[3] for ship in ships], .5)
+        for i, (speed, x, y, heading) in enumerate(ships):
+            vehicle, eta, nu, u_actual = scalar_ships[i]
+            scalar_sim_data, eta, nu, u_actual = Utilities.getNextPosition(speed, heading, eta, vehicle, .5, nu, u_actual)
+            scalar_ships[i] = [vehicle, eta, nu, u_actual]
+            assert np.allclose(sim_data[i], scalar_sim_data[0], rtol = 1e-12, atol = 1e-9)
+    for i in range(len(ships)):
+        assert np.allclose(state.eta[i], scalar_ships[i][1], rtol = 1e-12, atol = 1e-9)
+        assert np.isclose(state.e_int[i], scalar_ships[i][0].e_int)
+
+def test_step_only_advances_selected_ships():
+    state = WorldState()
+    for x in [0, 100]:
+        vehicle = frigate('headingAutopilot', 5, 0)
+        state.add_ship(vehicle, np.array([x, 0, 0, 0, 0, 0], float), vehicle.nu, vehicle.u_actual)
+    state.step([1], [0], 1)
+    assert state.eta[0][0] == 0
+    assert state.eta[1][0] == 105
+
+def test_long_steps_are_split_into_stable_substeps():
+    states = [WorldState(), WorldState()]
+    for state in states:
+        vehicle = frigate('headingAutopilot', 6, 0)
+        state.add_ship(vehicle, np.zeros(6), vehicle.nu, vehicle.u_actual)
+    assert .5 <= states[0].max_substep < 1
+    for _ in range(10):
+        states[0].step([0], [30], 5)
+        for _ in range(10):
+            states[1].step([0], [30], .5)
+    assert np.allclose(states[0].eta, states[1].eta)
+    assert np.allclose(states[0].psi_d, states[1].psi_d)